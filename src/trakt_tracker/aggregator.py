@@ -22,28 +22,54 @@ def build_daily_aggregates(
     rows: list[ProcessedEventRow],
     day_start_utc: datetime,
 ) -> list[DailyAggregate]:
-    outputs: list[DailyAggregate] = []
-
-    for media_type in ("all", "movie", "episode"):
-        scoped_rows = rows if media_type == "all" else [row for row in rows if row.media_type == media_type]
-        if not scoped_rows:
-            continue
-
-        events_count = len(scoped_rows)
-        unique_titles_count = len({row.title_key for row in scoped_rows})
-        watch_minutes_total = round(sum(row.runtime_min for row in scoped_rows), 2)
-        rewatch_events_count = sum(1 for row in scoped_rows if row.is_rewatch)
-
-        outputs.append(
-            DailyAggregate(
-                day_start_utc=day_start_utc,
-                media_type=media_type,
-                events_count=events_count,
-                unique_titles_count=unique_titles_count,
-                watch_minutes_total=watch_minutes_total,
-                rewatch_events_count=rewatch_events_count,
-                first_watch_events_count=events_count - rewatch_events_count,
-            )
+    events: dict[str, int] = {}
+    minutes: dict[str, float] = {}
+    rewatches: dict[str, int] = {}
+    titles: dict[str, set[str]] = {}
+
+    for row in rows:
+        media_type = row.media_type
+        if media_type in events:
+            events[media_type] += 1
+            minutes[media_type] += row.runtime_min
+            rewatches[media_type] += row.is_rewatch
+            titles[media_type].add(row.title_key)
+        else:
+            events[media_type] = 1
+            minutes[media_type] = row.runtime_min
+            rewatches[media_type] = int(row.is_rewatch)
+            titles[media_type] = {row.title_key}
+
+    if not events:
+        return []
+
+    # The "all" bucket is reduced from the per-type buckets rather than tracked per row.
+    buckets = {
+        "all": (
+            sum(events.values()),
+            len(set().union(*titles.values())),
+            sum(minutes.values()),
+            sum(rewatches.values()),
         )
+    }
+    for media_type in ("movie", "episode"):
+        if media_type in events:
+            buckets[media_type] = (
+                events[media_type],
+                len(titles[media_type]),
+                minutes[media_type],
+                rewatches[media_type],
+            )
 
-    return outputs
+    return [
+        DailyAggregate(
+            day_start_utc=day_start_utc,
+            media_type=media_type,
+            events_count=events_count,
+            unique_titles_count=unique_titles_count,
+            watch_minutes_total=round(watch_minutes_total, 2),
+            rewatch_events_count=rewatch_events_count,
+            first_watch_events_count=events_count - rewatch_events_count,
+        )
+        for media_type, (events_count, unique_titles_count, watch_minutes_total, rewatch_events_count) in buckets.items()
+    ]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import logging
 import sys
 import time
@@ -17,6 +18,11 @@ TRAKT_DEVICE_CODE_URL = "https://api.trakt.tv/oauth/device/code"
 TRAKT_DEVICE_TOKEN_URL = "https://api.trakt.tv/oauth/device/token"
 OOB_REDIRECT_URI = "urn:ietf:wg:oauth:2.0:oob"
 
+_DEVICE_WAITING_TEMPLATE = (
+    "\rWaiting for Trakt approval {spinner} "
+    "(next check in {poll_interval}s, expires in {minutes:02d}:{seconds:02d})"
+)
+
 
 def ensure_refresh_token(
     settings: Settings,
@@ -101,10 +107,10 @@ def exchange_auth_code_for_refresh_token(settings: Settings, auth_code: str) ->
         )
 
     if response.status_code >= 400:
-        detail = response.text.strip()[:512] if response.text else "<empty>"
+        detail = _response_detail(response.content)
         raise RuntimeError(f"Trakt OAuth code exchange failed status={response.status_code}, detail={detail}")
 
-    payload = response.json()
+    payload = json.loads(response.content)
     refresh_token = payload.get("refresh_token")
     if not refresh_token:
         raise RuntimeError("Trakt OAuth code exchange did not return refresh_token.")
@@ -112,19 +118,19 @@ def exchange_auth_code_for_refresh_token(settings: Settings, auth_code: str) ->
 
 
 def exchange_device_flow_for_refresh_token(settings: Settings, logger: logging.Logger) -> str:
-    with httpx.Client(timeout=30.0) as http:
+    # One HTTP/2 client for the whole flow so every poll reuses the same connection.
+    with httpx.Client(http2=True, timeout=30.0, headers={"Content-Type": "application/json"}) as http:
         device_response = http.post(
             TRAKT_DEVICE_CODE_URL,
             json={"client_id": settings.trakt_client_id},
-            headers={"Content-Type": "application/json"},
         )
         if device_response.status_code >= 400:
-            detail = device_response.text.strip()[:512] if device_response.text else "<empty>"
+            detail = _response_detail(device_response.content)
             raise RuntimeError(
                 f"Trakt device code request failed status={device_response.status_code}, detail={detail}"
             )
 
-        payload = device_response.json()
+        payload = json.loads(device_response.content)
         device_code = payload.get("device_code")
         user_code = payload.get("user_code")
         verification_url = payload.get("verification_url")
@@ -142,6 +148,11 @@ def exchange_device_flow_for_refresh_token(settings: Settings, logger: logging.L
         print(f"Open: {verification_url}")
         print(f"Enter code: {user_code}")
 
+        poll_json = {
+            "code": device_code,
+            "client_id": settings.trakt_client_id,
+            "client_secret": settings.trakt_client_secret,
+        }
         deadline = time.monotonic() + expires_in
         poll_interval = max(1, interval)
         use_tty_progress = sys.stdout.isatty()
@@ -156,35 +167,24 @@ def exchange_device_flow_for_refresh_token(settings: Settings, logger: logging.L
                 seconds_left=int(max(0, deadline - time.monotonic())),
             )
             time.sleep(poll_interval)
-            token_response = http.post(
-                TRAKT_DEVICE_TOKEN_URL,
-                json={
-                    "code": device_code,
-                    "client_id": settings.trakt_client_id,
-                    "client_secret": settings.trakt_client_secret,
-                },
-                headers={"Content-Type": "application/json"},
-            )
+            token_response = http.post(TRAKT_DEVICE_TOKEN_URL, json=poll_json)
 
+            raw = token_response.content
             if token_response.status_code == 200:
-                token_payload = token_response.json()
+                token_payload = json.loads(raw)
                 refresh_token = token_payload.get("refresh_token")
                 if not refresh_token:
                     raise RuntimeError("Trakt device token response missing refresh_token.")
                 _finish_device_waiting_status(enabled=use_tty_progress, message="Authorization confirmed.")
                 return str(refresh_token)
 
-            error_payload = {}
-            try:
-                error_payload = token_response.json()
-            except Exception:  # noqa: BLE001
-                pass
+            error_payload = _json_object_or_empty(raw)
             error_code = str(error_payload.get("error", "unknown_error"))
             if error_code == "unknown_error":
                 header_error = token_response.headers.get("X-Error-Type") or token_response.headers.get("x-error-type")
                 if header_error:
                     error_code = str(header_error)
-            detail = token_response.text.strip()[:512] if token_response.text else "<empty>"
+            detail = _response_detail(raw)
             logger.debug(
                 "trakt_device_token_poll",
                 extra={"status": token_response.status_code, "error": error_code, "detail": detail},
@@ -210,15 +210,34 @@ def exchange_device_flow_for_refresh_token(settings: Settings, logger: logging.L
     raise RuntimeError("Trakt device authorization timed out before approval.")
 
 
+def _response_detail(raw: bytes) -> str:
+    text = raw.strip()[:512]
+    if not text:
+        return "<empty>"
+    return text.decode("utf-8", "replace")
+
+
+def _json_object_or_empty(raw: bytes) -> dict:
+    try:
+        payload = json.loads(raw)
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
 def _render_device_waiting_status(enabled: bool, poll_attempt: int, poll_interval: int, seconds_left: int) -> None:
     if not enabled:
         return
-    spinner = "|/-\\"[(poll_attempt - 1) % 4]
-    line = (
-        "Waiting for Trakt approval "
-        f"{spinner} (next check in {poll_interval}s, expires in {_format_mm_ss(seconds_left)})"
+    # Callers already clamp seconds_left to >= 0.
+    minutes, seconds = divmod(seconds_left, 60)
+    sys.stdout.write(
+        _DEVICE_WAITING_TEMPLATE.format(
+            spinner="|/-\\"[(poll_attempt - 1) % 4],
+            poll_interval=poll_interval,
+            minutes=minutes,
+            seconds=seconds,
+        )
     )
-    sys.stdout.write(f"\r{line}")
     sys.stdout.flush()
 
 
@@ -229,8 +248,3 @@ def _finish_device_waiting_status(enabled: bool, message: str) -> None:
     sys.stdout.write("\r" + (" " * clear_width) + "\r")
     sys.stdout.write(f"{message}\n")
     sys.stdout.flush()
-
-
-def _format_mm_ss(seconds: int) -> str:
-    minutes, remainder = divmod(max(0, seconds), 60)
-    return f"{minutes:02d}:{remainder:02d}"
@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 from zoneinfo import ZoneInfo
 
 import tomllib
@@ -26,8 +26,10 @@ class Settings:
     influx_org: str
     influx_bucket_raw: str
     influx_bucket_agg: str
+    influx_batch_size: int
     sync_cron: str
     reconcile_cron: str
+    scheduler: str
     timezone: str
     overlap_hours: int
     reconcile_days: int
@@ -36,6 +38,8 @@ class Settings:
     trakt_max_retries: int
     trakt_retry_after_margin: float
     trakt_min_request_interval_seconds: float
+    trakt_request_burst: int
+    trakt_page_concurrency: int
     running_in_docker: bool
     config_path: str
 
@@ -48,21 +52,21 @@ def load_settings(require_influx: bool = True) -> Settings:
         load_dotenv(override=False)
 
     config_path = os.getenv("CONFIG_PATH") or _default_config_path(running_in_docker)
-    config_values = _load_config(Path(config_path))
+    pick = _Picker(_load_config(Path(config_path)))
 
-    trakt_client_id = _pick_str("TRAKT_CLIENT_ID", "trakt.client_id", config_values)
-    trakt_client_secret = _pick_str("TRAKT_CLIENT_SECRET", "trakt.client_secret", config_values)
+    trakt_client_id = pick.get("TRAKT_CLIENT_ID", "trakt.client_id", "", str)
+    trakt_client_secret = pick.get("TRAKT_CLIENT_SECRET", "trakt.client_secret", "", str)
 
     if not trakt_client_id:
         raise RuntimeError("Missing required configuration value: TRAKT_CLIENT_ID")
     if not trakt_client_secret:
         raise RuntimeError("Missing required configuration value: TRAKT_CLIENT_SECRET")
 
-    influx_enabled = _pick_bool("ENABLE_INFLUX", "influx.enabled", config_values, default=True)
+    influx_enabled = pick.get("ENABLE_INFLUX", "influx.enabled", True, _to_bool)
 
-    influx_url = _pick_str("INFLUX_URL", "influx.url", config_values, default="")
-    influx_token = _pick_str("INFLUX_TOKEN", "influx.token", config_values, default="")
-    influx_org = _pick_str("INFLUX_ORG", "influx.org", config_values, default="")
+    influx_url = pick.get("INFLUX_URL", "influx.url", "", str)
+    influx_token = pick.get("INFLUX_TOKEN", "influx.token", "", str)
+    influx_org = pick.get("INFLUX_ORG", "influx.org", "", str)
 
     if require_influx and influx_enabled:
         missing = [
@@ -77,41 +81,52 @@ def load_settings(require_influx: bool = True) -> Settings:
         if missing:
             raise RuntimeError(f"Missing required Influx configuration values: {', '.join(missing)}")
 
-    timezone = _pick_str("TIMEZONE", "sync.timezone", config_values, default="Europe/Berlin")
+    timezone = pick.get("TIMEZONE", "sync.timezone", "Europe/Berlin", str)
     ZoneInfo(timezone)
 
+    scheduler = pick.get("SCHEDULER", "sync.scheduler", "builtin", str).strip().lower()
+    if scheduler not in _SCHEDULERS:
+        raise RuntimeError(f"Unsupported SCHEDULER '{scheduler}' (expected one of: {', '.join(sorted(_SCHEDULERS))})")
+
     default_state_path = "/data/state.db" if running_in_docker else str(Path.cwd() / ".data" / "state.db")
 
     return Settings(
         trakt_client_id=trakt_client_id,
         trakt_client_secret=trakt_client_secret,
-        trakt_refresh_token=_pick_optional("TRAKT_REFRESH_TOKEN", "trakt.refresh_token", config_values),
-        trakt_auth_code=_pick_optional("TRAKT_AUTH_CODE", "trakt.auth_code", config_values),
+        trakt_refresh_token=pick.get("TRAKT_REFRESH_TOKEN", "trakt.refresh_token", None, str),
+        trakt_auth_code=pick.get("TRAKT_AUTH_CODE", "trakt.auth_code", None, str),
         influx_enabled=influx_enabled,
         influx_url=influx_url,
         influx_token=influx_token,
         influx_org=influx_org,
-        influx_bucket_raw=_pick_str("INFLUX_BUCKET_RAW", "influx.bucket_raw", config_values, default="trakt_raw"),
-        influx_bucket_agg=_pick_str("INFLUX_BUCKET_AGG", "influx.bucket_agg", config_values, default="trakt_agg"),
-        sync_cron=_pick_str("SYNC_CRON", "sync.sync_cron", config_values, default="0 6,18 * * *"),
-        reconcile_cron=_pick_str("RECONCILE_CRON", "sync.reconcile_cron", config_values, default="30 3 * * *"),
+        influx_bucket_raw=pick.get("INFLUX_BUCKET_RAW", "influx.bucket_raw", "trakt_raw", str),
+        influx_bucket_agg=pick.get("INFLUX_BUCKET_AGG", "influx.bucket_agg", "trakt_agg", str),
+        influx_batch_size=max(1, pick.get("INFLUX_BATCH_SIZE", "influx.batch_size", 5000, int)),
+        sync_cron=pick.get("SYNC_CRON", "sync.sync_cron", "0 6,18 * * *", str),
+        reconcile_cron=pick.get("RECONCILE_CRON", "sync.reconcile_cron", "30 3 * * *", str),
+        scheduler=scheduler,
         timezone=timezone,
-        overlap_hours=_pick_int("OVERLAP_HOURS", "sync.overlap_hours", config_values, default=24),
-        reconcile_days=_pick_int("RECONCILE_DAYS", "sync.reconcile_days", config_values, default=7),
-        state_db_path=_pick_str("STATE_DB_PATH", "runtime.state_db_path", config_values, default=default_state_path),
-        log_level=_pick_str("LOG_LEVEL", "runtime.log_level", config_values, default="INFO"),
-        trakt_max_retries=_pick_int("TRAKT_MAX_RETRIES", "runtime.trakt_max_retries", config_values, default=5),
-        trakt_retry_after_margin=_pick_float(
+        overlap_hours=pick.get("OVERLAP_HOURS", "sync.overlap_hours", 24, int),
+        reconcile_days=pick.get("RECONCILE_DAYS", "sync.reconcile_days", 7, int),
+        state_db_path=pick.get("STATE_DB_PATH", "runtime.state_db_path", default_state_path, str),
+        log_level=pick.get("LOG_LEVEL", "runtime.log_level", "INFO", str),
+        trakt_max_retries=pick.get("TRAKT_MAX_RETRIES", "runtime.trakt_max_retries", 5, int),
+        trakt_retry_after_margin=pick.get(
             "TRAKT_RETRY_AFTER_MARGIN",
             "runtime.trakt_retry_after_margin",
-            config_values,
-            default=0.9,
+            0.9,
+            float,
         ),
-        trakt_min_request_interval_seconds=_pick_float(
+        trakt_min_request_interval_seconds=pick.get(
             "TRAKT_MIN_REQUEST_INTERVAL_SECONDS",
             "runtime.trakt_min_request_interval_seconds",
-            config_values,
-            default=0.0,
+            0.0,
+            float,
+        ),
+        trakt_request_burst=max(1, pick.get("TRAKT_REQUEST_BURST", "runtime.trakt_request_burst", 10, int)),
+        trakt_page_concurrency=max(
+            1,
+            pick.get("TRAKT_PAGE_CONCURRENCY", "runtime.trakt_page_concurrency", 1, int),
         ),
         running_in_docker=running_in_docker,
         config_path=config_path,
@@ -132,67 +147,44 @@ def _load_config(path: Path) -> dict[str, Any]:
     return _flatten(parsed)
 
 
-def _flatten(payload: dict[str, Any], prefix: str = "") -> dict[str, Any]:
+def _flatten(payload: dict[str, Any]) -> dict[str, Any]:
     out: dict[str, Any] = {}
-    for key, value in payload.items():
-        dotted = f"{prefix}.{key}" if prefix else key
-        if isinstance(value, dict):
-            out.update(_flatten(value, dotted))
-        else:
-            out[dotted] = value
+    stack: list[tuple[str, dict[str, Any]]] = [("", payload)]
+    while stack:
+        prefix, node = stack.pop()
+        for key, value in node.items():
+            dotted = f"{prefix}.{key}" if prefix else key
+            if isinstance(value, dict):
+                stack.append((dotted, value))
+            else:
+                out[dotted] = value
     return out
 
 
-def _pick_optional(env_key: str, cfg_key: str, cfg: dict[str, Any]) -> str | None:
-    env_val = os.getenv(env_key)
-    if env_val not in {None, ""}:
-        return env_val
-    cfg_val = cfg.get(cfg_key)
-    if cfg_val in {None, ""}:
-        return None
-    return str(cfg_val)
-
-
-def _pick_str(env_key: str, cfg_key: str, cfg: dict[str, Any], default: str | None = None) -> str:
-    picked = _pick_optional(env_key, cfg_key, cfg)
-    if picked is None:
-        return "" if default is None else default
-    return picked
+class _Picker:
+    """Resolves a setting from ENV first, then the flattened config, then the default."""
 
+    __slots__ = ("_cfg",)
 
-def _pick_int(env_key: str, cfg_key: str, cfg: dict[str, Any], default: int) -> int:
-    env_val = os.getenv(env_key)
-    if env_val not in {None, ""}:
-        return int(env_val)
-    cfg_val = cfg.get(cfg_key)
-    if cfg_val is None:
-        return default
-    return int(cfg_val)
-
+    def __init__(self, cfg: dict[str, Any]) -> None:
+        self._cfg = cfg
 
-def _pick_float(env_key: str, cfg_key: str, cfg: dict[str, Any], default: float) -> float:
-    env_val = os.getenv(env_key)
-    if env_val not in {None, ""}:
-        return float(env_val)
-    cfg_val = cfg.get(cfg_key)
-    if cfg_val is None:
-        return default
-    return float(cfg_val)
+    def get(self, env_key: str, cfg_key: str, default: Any, kind: Callable[[Any], Any]) -> Any:
+        value = os.environ.get(env_key) or None
+        if value is None:
+            value = self._cfg.get(cfg_key)
+        if value is None or value == "":
+            return default
+        return kind(value)
 
 
-def _pick_bool(env_key: str, cfg_key: str, cfg: dict[str, Any], default: bool) -> bool:
-    env_val = os.getenv(env_key)
-    if env_val not in {None, ""}:
-        return _to_bool(env_val)
-    cfg_val = cfg.get(cfg_key)
-    if cfg_val is None:
-        return default
-    return _to_bool(cfg_val)
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+_SCHEDULERS = frozenset({"builtin", "apscheduler"})
 
 
 def _env_bool(key: str, default: bool) -> bool:
-    value = os.getenv(key)
-    if value in {None, ""}:
+    value = os.environ.get(key)
+    if not value:
         return default
     return _to_bool(value)
 
@@ -201,4 +193,4 @@ def _to_bool(value: Any) -> bool:
     if isinstance(value, bool):
         return value
     lowered = str(value).strip().lower()
-    return lowered in {"1", "true", "yes", "on"}
+    return lowered in _TRUE_VALUES
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Iterable
 
-from influxdb_client import InfluxDBClient, Point, WritePrecision
+from influxdb_client import InfluxDBClient, WritePrecision
 from influxdb_client.client.write_api import SYNCHRONOUS
 
 from trakt_tracker.aggregator import DailyAggregate
 from trakt_tracker.config import Settings
 from trakt_tracker.models import WatchEvent
 
+_ESCAPE_TAG = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"})
+_ESCAPE_STRING = str.maketrans({'"': r'\"', "\\": r"\\"})
+
+# (connect, read) in milliseconds. Writes, deletes and probes are all synchronous and share keep-alive connections
+# to the same host.
+_HTTP_TIMEOUT_MS = (5_000, 30_000)
+_HTTP_POOL_MAXSIZE = 4
+
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
 
 class InfluxWriter:
     def __init__(self, settings: Settings, logger: logging.Logger) -> None:
@@ -17,82 +29,66 @@ class InfluxWriter:
             url=settings.influx_url,
             token=settings.influx_token,
             org=settings.influx_org,
+            timeout=_HTTP_TIMEOUT_MS,
+            connection_pool_maxsize=_HTTP_POOL_MAXSIZE,
+            # Gzip write bodies: line protocol repeats measurement/tag keys on every line and compresses well.
+            enable_gzip=True,
         )
+        # Synchronous writes: a failed request raises here, before the caller marks the events as processed.
         self._write_api = self._client.write_api(write_options=SYNCHRONOUS)
         self._delete_api = self._client.delete_api()
         self._logger = logger
 
     def close(self) -> None:
+        self._write_api.close()
         self._client.close()
 
     def ping(self) -> bool:
         return self._client.ping()
 
-    def write_watch_events(self, events: list[WatchEvent]) -> None:
-        if not events:
-            return
-
-        points: list[Point] = []
-        for event in events:
-            point = (
-                Point("watch_event")
-                .tag("media_type", event.media_type)
-                .tag("source", "trakt")
-                .tag("is_rewatch", "true" if event.is_rewatch else "false")
-                .field("history_id", event.history_id)
-                .field("trakt_id", event.trakt_id)
-                .field("runtime_min", float(event.runtime_min))
-                .field("title", event.title)
-                .field("ingested_at", _iso_utc_now())
-                .time(event.watched_at.astimezone(timezone.utc), WritePrecision.S)
-            )
-
-            if event.show_trakt_id is not None:
-                point = point.field("show_trakt_id", event.show_trakt_id)
-            if event.season_number is not None:
-                point = point.field("season_number", event.season_number)
-            if event.episode_number is not None:
-                point = point.field("episode_number", event.episode_number)
-            if event.year is not None:
-                point = point.field("year", event.year)
-            if event.show_title:
-                point = point.field("show_title", event.show_title)
-
-            points.append(point)
-
-        self._write_api.write(
-            bucket=self._settings.influx_bucket_raw,
-            org=self._settings.influx_org,
-            record=points,
+    def write_watch_events(self, events: Iterable[WatchEvent]) -> None:
+        ingested_at = _iso_utc_now()
+        count = self._write_lines(
+            self._settings.influx_bucket_raw,
+            (_watch_event_to_line_protocol(event, ingested_at) for event in events),
         )
-        self._logger.info("influx_exported_watch_events", extra={"count": len(points), "bucket": self._settings.influx_bucket_raw})
+        if count:
+            self._logger.info("influx_exported_watch_events", extra={"count": count, "bucket": self._settings.influx_bucket_raw})
 
     def write_daily_aggregates(self, aggregates: list[DailyAggregate]) -> None:
-        if not aggregates:
-            return
-
-        points: list[Point] = []
-        for aggregate in aggregates:
-            points.append(
-                Point("watch_daily")
-                .tag("media_type", aggregate.media_type)
-                .field("events_count", aggregate.events_count)
-                .field("unique_titles_count", aggregate.unique_titles_count)
-                .field("watch_minutes_total", float(aggregate.watch_minutes_total))
-                .field("rewatch_events_count", aggregate.rewatch_events_count)
-                .field("first_watch_events_count", aggregate.first_watch_events_count)
-                .time(aggregate.day_start_utc.astimezone(timezone.utc), WritePrecision.S)
-            )
-
-        chunk_size = 2500
-        for i in range(0, len(points), chunk_size):
-            chunk = points[i:i + chunk_size]
+        count = self._write_lines(
+            self._settings.influx_bucket_agg,
+            (_daily_aggregate_to_line_protocol(aggregate) for aggregate in aggregates),
+        )
+        if count:
+            self._logger.info("influx_exported_aggregates", extra={"count": count, "bucket": self._settings.influx_bucket_agg})
+
+    def _write_lines(self, bucket: str, lines: Iterable[str]) -> int:
+        """
+        Write `lines` as pre-joined bytes bodies of at most `influx_batch_size` lines, one request per body.
+
+        Passing a list of str makes the client encode and join every line itself; one encoded body per chunk
+        skips that per-line work. Returns the line count.
+        """
+        count = 0
+        while chunk := list(islice(lines, self._settings.influx_batch_size)):
             self._write_api.write(
-                bucket=self._settings.influx_bucket_agg,
+                bucket=bucket,
                 org=self._settings.influx_org,
-                record=chunk,
+                record="\n".join(chunk).encode(),
+                write_precision=WritePrecision.S,
             )
-            self._logger.info("influx_exported_aggregates", extra={"count": len(chunk), "bucket": self._settings.influx_bucket_agg})
+            count += len(chunk)
+        return count
+
+    def write_test_point(self, bucket: str) -> None:
+        """Write a probe point synchronously so permission errors surface immediately."""
+        self._write_api.write(
+            bucket=bucket,
+            org=self._settings.influx_org,
+            record=f'trakt_tracker_test status="ok" {_to_epoch_s(datetime.now(timezone.utc))}',
+            write_precision=WritePrecision.S,
+        )
 
     def delete_watch_events_range(
         self,
@@ -101,18 +97,84 @@ class InfluxWriter:
     ) -> None:
         if end_exclusive_utc <= start_inclusive_utc:
             return
+        # The delete API treats stop as inclusive; stepping back one microsecond keeps points stamped exactly
+        # at the end (the next day's midnight, the next second) out of the delete.
         self._delete_api.delete(
             start=_to_rfc3339(start_inclusive_utc),
-            stop=_to_rfc3339(end_exclusive_utc),
+            stop=_to_rfc3339_precise(end_exclusive_utc - _ONE_MICROSECOND),
             predicate='_measurement="watch_event"',
             bucket=self._settings.influx_bucket_raw,
             org=self._settings.influx_org,
         )
 
 
+def _watch_event_to_line_protocol(event: WatchEvent, ingested_at: str) -> str:
+    fields = [
+        f"history_id={event.history_id}i",
+        f"trakt_id={event.trakt_id}i",
+        f"runtime_min={_format_float(event.runtime_min)}",
+        f'title="{_escape_string(event.title)}"',
+        f'ingested_at="{ingested_at}"',
+    ]
+    if event.show_trakt_id is not None:
+        fields.append(f"show_trakt_id={event.show_trakt_id}i")
+    if event.season_number is not None:
+        fields.append(f"season_number={event.season_number}i")
+    if event.episode_number is not None:
+        fields.append(f"episode_number={event.episode_number}i")
+    if event.year is not None:
+        fields.append(f"year={event.year}i")
+    if event.show_title:
+        fields.append(f'show_title="{_escape_string(event.show_title)}"')
+
+    return (
+        f"watch_event,is_rewatch={event.is_rewatch_str},"
+        f"media_type={_escape_tag(event.media_type)},source=trakt "
+        f"{','.join(fields)} {_to_epoch_s(event.watched_at)}"
+    )
+
+
+def _daily_aggregate_to_line_protocol(aggregate: DailyAggregate) -> str:
+    return (
+        f"watch_daily,media_type={_escape_tag(aggregate.media_type)} "
+        f"events_count={aggregate.events_count}i,"
+        f"unique_titles_count={aggregate.unique_titles_count}i,"
+        f"watch_minutes_total={_format_float(float(aggregate.watch_minutes_total))},"
+        f"rewatch_events_count={aggregate.rewatch_events_count}i,"
+        f"first_watch_events_count={aggregate.first_watch_events_count}i "
+        f"{_to_epoch_s(aggregate.day_start_utc)}"
+    )
+
+
+def _escape_tag(value: str) -> str:
+    return value.translate(_ESCAPE_TAG)
+
+
+def _escape_string(value: str) -> str:
+    return value.translate(_ESCAPE_STRING)
+
+
+def _format_float(value: float) -> str:
+    # Same encoding as influxdb_client: whole numbers drop the trailing ".0".
+    text = repr(value)
+    return text[:-2] if text.endswith(".0") else text
+
+
+def _to_epoch_s(value: datetime) -> int:
+    # timestamp() on an aware datetime is already UTC-based; no astimezone round-trip needed.
+    return int(value.timestamp())
+
+
+_RFC3339_UTC_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
 def _iso_utc_now() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    return datetime.now(timezone.utc).strftime(_RFC3339_UTC_FORMAT)
 
 
 def _to_rfc3339(value: datetime) -> str:
-    return value.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    return value.astimezone(timezone.utc).strftime(_RFC3339_UTC_FORMAT)
+
+
+def _to_rfc3339_precise(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
@@ -1,88 +1,114 @@
 import logging
 import sys
+from typing import Callable
+
+_IGNORE_LOGGERS = frozenset({"apscheduler.scheduler", "apscheduler.executors.default"})
+
+_ICON_BY_LEVELNO = {
+    logging.DEBUG: "   ",
+    logging.INFO: " \033[94m>\033[0m ",
+    logging.WARNING: " \033[93m!\033[0m ",
+    logging.ERROR: " \033[91mX\033[0m ",
+    logging.CRITICAL: " \033[95m!!\033[0m ",
+}
+
 
 class ColorFormatter(logging.Formatter):
     """Custom formatter with colors for terminal output."""
 
-    COLORS = {
-        "DEBUG": "\033[90m",
-        "INFO": "\033[97m",
-        "WARNING": "\033[93m",
-        "ERROR": "\033[91m",
-        "CRITICAL": "\033[95m",
-    }
     RESET = "\033[0m"
 
-    ICONS = {
-        "DEBUG": "   ",
-        "INFO": " \033[94m>\033[0m ",
-        "WARNING": " \033[93m!\033[0m ",
-        "ERROR": " \033[91mX\033[0m ",
-        "CRITICAL": " \033[95m!!\033[0m ",
-    }
-
-    IGNORE_LOGGERS = {"apscheduler.scheduler", "apscheduler.executors.default"}
-
     def format(self, record):
-        if hasattr(record, "name") and record.name in self.IGNORE_LOGGERS and record.levelname == "INFO":
+        cached = record.__dict__.get("_cached_color_format")
+        if cached is not None:
+            return cached
+
+        if record.levelno == logging.INFO and record.name in _IGNORE_LOGGERS:
             return None
 
         msg = record.getMessage()
 
-        if msg == "service_bootstrap_backfill":
-            return f"\033[36m🔄\033[0m Starting initial backfill sync..."
-        elif msg == "service_bootstrap_incremental":
-            return f"\033[36m🔄\033[0m Starting incremental sync..."
-        elif msg == "sync_start":
-            return None
-        elif msg == "sync_finished":
-            return None
-        elif msg == "service_scheduler_started":
-            return f"\033[92m●\033[0m Scheduler started. Monitoring active."
-        elif msg == "runtime_docker_mode":
-            return f"\033[94m🐳\033[0m Running in Docker mode"
-        elif msg == "trakt_auth_ready":
-            return f"\033[92m✓\033[0m Trakt authentication ready"
-        elif msg == "influx_disabled":
-            return f"\033[93m⚠\033[0m InfluxDB is disabled"
-        elif msg == "service_shutdown":
-            print()
-            print("\033[94m" + "-" * 50 + "\033[0m")
-            print()
-            return f"\033[90m   Stopped gracefully.\033[0m\n"
-        elif msg == "backfill_already_completed":
-            return f"\033[92m✓\033[0m Backfill already completed, skipping"
-        elif msg == "reconcile_hard_deletes_applied":
-            deleted = getattr(record, "events_deleted", 0)
-            return f"\033[35m🗑️\033[0m Reconcile applied (Deleted: {deleted} events)"
-        elif msg == "influx_exported_watch_events":
-            count = getattr(record, "count", 0)
-            bucket = getattr(record, "bucket", "unknown")
-            return f"\033[96m📤\033[0m Exported \033[1m{count}\033[0m raw events to \033[90m{bucket}\033[0m"
-        elif msg == "influx_exported_aggregates":
-            count = getattr(record, "count", 0)
-            bucket = getattr(record, "bucket", "unknown")
-            return f"\033[96m📤\033[0m Exported \033[1m{count}\033[0m daily aggregates to \033[90m{bucket}\033[0m"
-        elif msg == "auth_refresh_token_missing":
-            return f"\033[93m⚠\033[0m Trakt auth: Refresh token missing"
-        elif msg == "trakt_auth_failed":
-            reason = getattr(record, "reason", "Unknown error")
-            return f"\033[91mX\033[0m Trakt Authentication Failed: {reason}\n   \033[93mPlease run 'trakt-tracker --auth' to re-authenticate.\033[0m"
-        elif msg == "authenticating":
-            return f"\033[36m🔄\033[0m Authenticating with Trakt..."
-        elif msg == "authenticated":
-            return f"\033[92m✓\033[0m Authenticated successfully"
-        elif msg == "auth_code_exchange":
-            return f"\033[36m🔄\033[0m Exchanging auth code..."
-
-        icon = self.ICONS.get(record.levelname, "   ")
+        handler = _MESSAGE_FORMATTERS.get(msg)
+        if handler is not None:
+            return handler(record)
+
+        icon = _ICON_BY_LEVELNO.get(record.levelno, "   ")
         return f"{icon}{msg}"
 
 
+def _format_service_shutdown(record):
+    print()
+    print("\033[94m" + "-" * 50 + "\033[0m")
+    print()
+    return f"\033[90m   Stopped gracefully.\033[0m\n"
+
+
+def _format_reconcile_hard_deletes_applied(record):
+    deleted = record.__dict__.get("events_deleted", 0)
+    return f"\033[35m🗑️\033[0m Reconcile applied (Deleted: {deleted} events)"
+
+
+def _format_influx_exported_watch_events(record):
+    extras = record.__dict__
+    count = extras.get("count", 0)
+    bucket = extras.get("bucket", "unknown")
+    return f"\033[96m📤\033[0m Exported \033[1m{count}\033[0m raw events to \033[90m{bucket}\033[0m"
+
+
+def _format_influx_exported_aggregates(record):
+    extras = record.__dict__
+    count = extras.get("count", 0)
+    bucket = extras.get("bucket", "unknown")
+    return f"\033[96m📤\033[0m Exported \033[1m{count}\033[0m daily aggregates to \033[90m{bucket}\033[0m"
+
+
+def _format_trakt_auth_failed(record):
+    reason = record.__dict__.get("reason", "Unknown error")
+    return f"\033[91mX\033[0m Trakt Authentication Failed: {reason}\n   \033[93mPlease run 'trakt-tracker --auth' to re-authenticate.\033[0m"
+
+
+def _format_scheduled_job_failed(record):
+    extras = record.__dict__
+    job_id = extras.get("job_id", "unknown")
+    error = extras.get("error", "Unknown error")
+    return f"\033[91mX\033[0m Scheduled job {job_id} failed: {error}"
+
+
+# Event name -> renderer. A renderer returning None suppresses the record.
+_MESSAGE_FORMATTERS: dict[str, Callable[[logging.LogRecord], str | None]] = {
+    "service_bootstrap_backfill": lambda record: "\033[36m🔄\033[0m Starting initial backfill sync...",
+    "service_bootstrap_incremental": lambda record: "\033[36m🔄\033[0m Starting incremental sync...",
+    "sync_start": lambda record: None,
+    "sync_finished": lambda record: None,
+    "service_scheduler_started": lambda record: "\033[92m●\033[0m Scheduler started. Monitoring active.",
+    "scheduled_job_failed": _format_scheduled_job_failed,
+    "runtime_docker_mode": lambda record: "\033[94m🐳\033[0m Running in Docker mode",
+    "trakt_auth_ready": lambda record: "\033[92m✓\033[0m Trakt authentication ready",
+    "influx_disabled": lambda record: "\033[93m⚠\033[0m InfluxDB is disabled",
+    "service_shutdown": _format_service_shutdown,
+    "backfill_already_completed": lambda record: "\033[92m✓\033[0m Backfill already completed, skipping",
+    "reconcile_hard_deletes_applied": _format_reconcile_hard_deletes_applied,
+    "influx_exported_watch_events": _format_influx_exported_watch_events,
+    "influx_exported_aggregates": _format_influx_exported_aggregates,
+    "auth_refresh_token_missing": lambda record: "\033[93m⚠\033[0m Trakt auth: Refresh token missing",
+    "trakt_auth_failed": _format_trakt_auth_failed,
+    "authenticating": lambda record: "\033[36m🔄\033[0m Authenticating with Trakt...",
+    "authenticated": lambda record: "\033[92m✓\033[0m Authenticated successfully",
+    "auth_code_exchange": lambda record: "\033[36m🔄\033[0m Exchanging auth code...",
+}
+
+
+_SHARED_FORMATTER = ColorFormatter()
+
+
 class NoNoneFilter(logging.Filter):
     def filter(self, record):
-        formatted = ColorFormatter().format(record)
-        return formatted is not None
+        # Format once here and let the handler's formatter reuse the result.
+        formatted = _SHARED_FORMATTER.format(record)
+        if formatted is None:
+            return False
+        record._cached_color_format = formatted
+        return True
 
 def configure_logging(level: str) -> None:
     console_handler = logging.StreamHandler(sys.stdout)
@@ -2,21 +2,31 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import functools
 import logging
+import os
 import platform
+import re
 import sys
-
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.cron import CronTrigger
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 
 from trakt_tracker.auth import ensure_refresh_token
 from trakt_tracker.config import Settings, load_settings
-from trakt_tracker.influx_writer import InfluxWriter
 from trakt_tracker.noop_influx_writer import NoopInfluxWriter
 from trakt_tracker.state_store import StateStore
 from trakt_tracker.sync_engine import SyncEngine
 from trakt_tracker.trakt_client import TraktClient
 
+if TYPE_CHECKING:
+    from apscheduler.triggers.cron import CronTrigger
+
+    from trakt_tracker.influx_writer import InfluxWriter
+
+_CRON_LOOP_MAX_SLEEP_SECONDS = 60.0
+_ANSI_ESCAPE_RE = re.compile(r"\033\[[0-9;]*m")
+
 
 def main() -> None:
     _configure_event_loop_policy_for_windows()
@@ -32,7 +42,6 @@ def main() -> None:
         )
 
     if args.reset_state:
-        import os
         logger.warning(f"\033[93m⚠\033[0m Resetting local state database: {settings.state_db_path}")
         if os.path.exists(settings.state_db_path):
             try:
@@ -70,6 +79,8 @@ def main() -> None:
                 logger.error("Cannot test InfluxDB because it is disabled.")
                 sys.exit(1)
             
+            from trakt_tracker.influx_writer import InfluxWriter
+
             logger.info(f"Testing InfluxDB connection to {settings.influx_url}...")
             test_writer = InfluxWriter(settings=settings, logger=logger)
             try:
@@ -79,17 +90,12 @@ def main() -> None:
                     logger.error("\033[91mX\033[0m Failed to ping InfluxDB.")
                     sys.exit(1)
 
-                # Test writing a dummy point to raw bucket
-                from influxdb_client import Point
-                import datetime
-
                 logger.info(f"Testing write permissions to raw bucket '{settings.influx_bucket_raw}'...")
-                test_point = Point("trakt_tracker_test").field("status", "ok").time(datetime.datetime.now(datetime.timezone.utc))
-                test_writer._write_api.write(bucket=settings.influx_bucket_raw, org=settings.influx_org, record=test_point)
+                test_writer.write_test_point(settings.influx_bucket_raw)
                 logger.info("\033[92m✓\033[0m Successfully wrote to raw bucket.")
 
                 logger.info(f"Testing write permissions to agg bucket '{settings.influx_bucket_agg}'...")
-                test_writer._write_api.write(bucket=settings.influx_bucket_agg, org=settings.influx_org, record=test_point)
+                test_writer.write_test_point(settings.influx_bucket_agg)
                 logger.info("\033[92m✓\033[0m Successfully wrote to agg bucket.")
                 
                 logger.info(f"\033[92m★\033[0m InfluxDB test completed successfully! All permissions look good.")
@@ -100,7 +106,12 @@ def main() -> None:
                 test_writer.close()
             return
 
-        influx_writer = InfluxWriter(settings=settings, logger=logger) if use_influx else NoopInfluxWriter()
+        if use_influx:
+            from trakt_tracker.influx_writer import InfluxWriter
+
+            influx_writer = InfluxWriter(settings=settings, logger=logger)
+        else:
+            influx_writer = NoopInfluxWriter()
 
         engine = SyncEngine(
             settings=settings,
@@ -115,7 +126,12 @@ def main() -> None:
         from trakt_tracker.exceptions import TraktAuthenticationError
         try:
             if args.once:
-                _run_once(engine=engine, once_job=args.once, force_backfill=args.force_backfill)
+                _run_once(
+                    engine=engine,
+                    state_store=state_store,
+                    once_job=args.once,
+                    force_backfill=args.force_backfill,
+                )
                 return
 
             _run_service(settings=settings, engine=engine, state_store=state_store, logger=logger)
@@ -140,24 +156,40 @@ def _run_service(
     if not state_store.get_backfill_completed():
         logger.info("service_bootstrap_backfill")
         engine.run_backfill()
+        state_store.checkpoint()
 
     logger.info("service_bootstrap_incremental")
     engine.run_incremental()
 
-    scheduler = BlockingScheduler(timezone=settings.timezone)
+    if settings.scheduler == "apscheduler":
+        _run_apscheduler(settings=settings, engine=engine, logger=logger)
+    else:
+        _run_cron_loop(settings=settings, engine=engine, logger=logger)
+
+
+def _run_apscheduler(settings: Settings, engine: SyncEngine, logger: logging.Logger) -> None:
+    from apscheduler.executors.pool import ThreadPoolExecutor
+    from apscheduler.schedulers.blocking import BlockingScheduler
+
+    # One worker: both jobs share the engine and its StateStore connection, whose transaction depth and caches
+    # are not thread-safe, so an incremental run and a reconcile must never overlap (same as the cron loop).
+    # A job queued behind the other starts late; misfire_grace_time=None keeps it from being skipped as misfired.
+    scheduler = BlockingScheduler(timezone=settings.timezone, executors={"default": ThreadPoolExecutor(1)})
     scheduler.add_job(
         engine.run_incremental,
-        trigger=CronTrigger.from_crontab(settings.sync_cron, timezone=settings.timezone),
+        trigger=_cron_trigger(settings.sync_cron, settings.timezone),
         id="incremental_sync",
         coalesce=True,
         max_instances=1,
+        misfire_grace_time=None,
     )
     scheduler.add_job(
         engine.run_reconcile,
-        trigger=CronTrigger.from_crontab(settings.reconcile_cron, timezone=settings.timezone),
+        trigger=_cron_trigger(settings.reconcile_cron, settings.timezone),
         id="daily_reconcile",
         coalesce=True,
         max_instances=1,
+        misfire_grace_time=None,
     )
 
     logger.info(
@@ -171,9 +203,56 @@ def _run_service(
         logger.info("service_shutdown")
 
 
-def _run_once(engine: SyncEngine, once_job: str, force_backfill: bool) -> None:
+def _run_cron_loop(settings: Settings, engine: SyncEngine, logger: logging.Logger) -> None:
+    """Run the two static cron jobs in this thread, sleeping until the earliest next fire time."""
+    jobs = {
+        "incremental_sync": (engine.run_incremental, _cron_trigger(settings.sync_cron, settings.timezone)),
+        "daily_reconcile": (engine.run_reconcile, _cron_trigger(settings.reconcile_cron, settings.timezone)),
+    }
+    now = datetime.now(timezone.utc)
+    next_runs = {job_id: trigger.get_next_fire_time(None, now) for job_id, (_, trigger) in jobs.items()}
+
+    logger.info(
+        "service_scheduler_started",
+        extra={"sync_cron": settings.sync_cron, "reconcile_cron": settings.reconcile_cron},
+    )
+
+    try:
+        while True:
+            pending = [(fire_at, job_id) for job_id, fire_at in next_runs.items() if fire_at is not None]
+            if not pending:
+                return
+            fire_at, job_id = min(pending)
+
+            # Sleep in short slices so wall-clock jumps (NTP, suspend) are picked up on the next check.
+            delay = (fire_at - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                time.sleep(min(delay, _CRON_LOOP_MAX_SLEEP_SECONDS))
+                continue
+
+            job, trigger = jobs[job_id]
+            try:
+                job()
+            except Exception as error:  # noqa: BLE001
+                logger.error("scheduled_job_failed", extra={"job_id": job_id, "error": str(error)})
+
+            # Runs missed while a job was busy are coalesced into the next fire time after now.
+            next_runs[job_id] = trigger.get_next_fire_time(None, datetime.now(timezone.utc))
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("service_shutdown")
+
+
+@functools.lru_cache(maxsize=8)
+def _cron_trigger(expression: str, tz: str) -> CronTrigger:
+    from apscheduler.triggers.cron import CronTrigger
+
+    return CronTrigger.from_crontab(expression, timezone=tz)
+
+
+def _run_once(engine: SyncEngine, state_store: StateStore, once_job: str, force_backfill: bool) -> None:
     if once_job == "backfill":
         engine.run_backfill(force=force_backfill)
+        state_store.checkpoint()
         return
     if once_job == "incremental":
         engine.run_incremental()
@@ -205,10 +284,13 @@ def _print_header(
         if fetched_user:
             trakt_user = fetched_user
             
+    interactive = sys.stdout.isatty()
+
     influx_status = "Disabled"
     if settings.influx_enabled:
         influx_status = f"{settings.influx_url}"
-        if influx_writer and hasattr(influx_writer, 'ping'):
+        # The connectivity check is a blocking HTTP round-trip; only spend it when someone is watching.
+        if interactive and influx_writer and hasattr(influx_writer, 'ping'):
             try:
                 if influx_writer.ping():
                     influx_status += " (\033[92mConnected\033[0m)"
@@ -218,28 +300,34 @@ def _print_header(
                 influx_status += " (\033[91mError\033[0m)"
 
     try:
-        from apscheduler.triggers.cron import CronTrigger
-        from datetime import datetime, timezone
-        sync_trigger = CronTrigger.from_crontab(settings.sync_cron, timezone=settings.timezone)
+        sync_trigger = _cron_trigger(settings.sync_cron, settings.timezone)
         next_sync = sync_trigger.get_next_fire_time(None, datetime.now(timezone.utc))
         next_sync_str = next_sync.astimezone().strftime("%Y-%m-%d %H:%M:%S")
     except Exception:
         next_sync_str = "Unknown"
 
-    print()
-    print("\033[94m" + "=" * 50 + "\033[0m")
-    print(f"\033[1m   Trakt Tracker v{__version__}\033[0m")
-    print("\033[94m" + "=" * 50 + "\033[0m")
-    print()
-    print(f"   \033[90mGitHub:\033[0m    https://github.com/nichtlegacy/trakt-tracker")
-    print(f"   \033[90mUser:\033[0m      {trakt_user}")
-    print(f"   \033[90mInfluxDB:\033[0m  {influx_status}")
+    lines = [
+        "",
+        "\033[94m" + "=" * 50 + "\033[0m",
+        f"\033[1m   Trakt Tracker v{__version__}\033[0m",
+        "\033[94m" + "=" * 50 + "\033[0m",
+        "",
+        "   \033[90mGitHub:\033[0m    https://github.com/nichtlegacy/trakt-tracker",
+        f"   \033[90mUser:\033[0m      {trakt_user}",
+        f"   \033[90mInfluxDB:\033[0m  {influx_status}",
+    ]
     if settings.influx_enabled:
-        print(f"   \033[90mBucket:\033[0m    {settings.influx_bucket_raw} (raw) / {settings.influx_bucket_agg} (agg)")
-    print(f"   \033[90mSync cron:\033[0m {settings.sync_cron} (Next: {next_sync_str})")
-    print()
-    print("\033[94m" + "-" * 50 + "\033[0m")
-    print()
+        lines.append(f"   \033[90mBucket:\033[0m    {settings.influx_bucket_raw} (raw) / {settings.influx_bucket_agg} (agg)")
+    lines += [
+        f"   \033[90mSync cron:\033[0m {settings.sync_cron} (Next: {next_sync_str})",
+        "",
+        "\033[94m" + "-" * 50 + "\033[0m",
+        "",
+    ]
+    header = "\n".join(lines)
+    if not interactive or os.environ.get("NO_COLOR"):
+        header = _ANSI_ESCAPE_RE.sub("", header)
+    print(header)
 
 
 def _configure_event_loop_policy_for_windows() -> None:
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WatchEvent:
     history_id: int
     watched_at: datetime
@@ -19,9 +19,17 @@ class WatchEvent:
     title: str
     show_title: str | None
     is_rewatch: bool
+    is_rewatch_str: str = field(init=False, repr=False, compare=False)
+    title_key: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def title_key(self) -> str:
+    def __post_init__(self) -> None:
+        # Coerce once here so the Influx serializer can read these attributes as-is.
+        if type(self.runtime_min) is not float:
+            object.__setattr__(self, "runtime_min", float(self.runtime_min))
+        object.__setattr__(self, "is_rewatch_str", "true" if self.is_rewatch else "false")
+        object.__setattr__(self, "title_key", self._build_title_key())
+
+    def _build_title_key(self) -> str:
         if self.media_type == "episode":
             show_part = self.show_trakt_id if self.show_trakt_id is not None else self.show_title or "unknown_show"
             season = self.season_number if self.season_number is not None else 0
@@ -33,26 +41,11 @@ class WatchEvent:
 
 def _parse_datetime(value: str) -> datetime:
     if value.endswith("Z"):
-        value = value[:-1] + "+00:00"
-    return datetime.fromisoformat(value).astimezone(timezone.utc)
-
-
-
-def _extract_runtime(payload: dict[str, Any], media_type: str) -> float:
-    if media_type == "movie":
-        movie = payload.get("movie", {})
-        runtime = movie.get("runtime")
-        return float(runtime) if runtime is not None else 0.0
-
-    episode = payload.get("episode", {})
-    runtime = episode.get("runtime")
-    return float(runtime) if runtime is not None else 0.0
-
-
-
-def _extract_primary(media_type: str, payload: dict[str, Any]) -> dict[str, Any]:
-    key = "movie" if media_type == "movie" else "episode"
-    return payload.get(key, {})
+        # Trakt always sends UTC with a "Z" suffix; attach the tzinfo directly instead of converting.
+        return datetime.fromisoformat(value[:-1]).replace(tzinfo=timezone.utc)
+    parsed = datetime.fromisoformat(value)
+    # A "+00:00" suffix already parses to the timezone.utc singleton; only convert other offsets.
+    return parsed if parsed.tzinfo is timezone.utc else parsed.astimezone(timezone.utc)
 
 
 
@@ -61,7 +54,8 @@ def parse_watch_event(payload: dict[str, Any]) -> WatchEvent:
     if media_type not in {"movie", "episode"}:
         raise ValueError(f"Unsupported media type: {media_type}")
 
-    primary = _extract_primary(media_type, payload)
+    # The payload key for the primary object matches the media type ("movie" / "episode").
+    primary = payload.get(media_type, {})
     ids = primary.get("ids", {})
     trakt_id = ids.get("trakt")
     if trakt_id is None:
@@ -78,6 +72,7 @@ def parse_watch_event(payload: dict[str, Any]) -> WatchEvent:
     if history_id is None:
         raise ValueError("Missing history id in payload")
 
+    runtime = primary.get("runtime")
     return WatchEvent(
         history_id=int(history_id),
         watched_at=_parse_datetime(watched_at_raw),
@@ -86,7 +81,7 @@ def parse_watch_event(payload: dict[str, Any]) -> WatchEvent:
         show_trakt_id=int(show_ids["trakt"]) if show_ids.get("trakt") is not None else None,
         season_number=int(primary["season"]) if primary.get("season") is not None else None,
         episode_number=int(primary["number"]) if primary.get("number") is not None else None,
-        runtime_min=_extract_runtime(payload, media_type),
+        runtime_min=float(runtime) if runtime is not None else 0.0,
         year=int(primary["year"]) if primary.get("year") is not None else None,
         title=str(primary.get("title") or "Unknown"),
         show_title=str(show.get("title")) if show.get("title") else None,
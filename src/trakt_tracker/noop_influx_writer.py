@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Iterable
 
 from trakt_tracker.aggregator import DailyAggregate
 from trakt_tracker.models import WatchEvent
@@ -17,7 +18,7 @@ class NoopInfluxWriter:
     def ping(self) -> bool:
         return True
 
-    def write_watch_events(self, events: list[WatchEvent]) -> None:
+    def write_watch_events(self, events: Iterable[WatchEvent]) -> None:
         del events
         return
 
@@ -1,16 +1,125 @@
 from __future__ import annotations
 
-import json
+import logging
 import sqlite3
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from operator import attrgetter
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
-from trakt_tracker.models import WatchEvent
+import orjson
 
+from trakt_tracker.models import WatchEvent
 
-@dataclass(frozen=True)
+_LOGGER = logging.getLogger("trakt_tracker.state_store")
+
+_FETCH_CHUNK_SIZE = 1000
+_INSERT_CHUNK_SIZE = 1000
+
+# Bump whenever _init_schema gains a migration step; databases already at this version skip all of them.
+_CURRENT_SCHEMA_VERSION = 3
+
+# How long a statement waits on another connection's lock before raising "database is locked".
+_BUSY_TIMEOUT_SECONDS = 5.0
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Per-connection settings, applied once right after connecting, after the journal pragmas. The defaults
+# (WAL plus synchronous=NORMAL) make a batch transaction one WAL append with no fsync until checkpoint;
+# throwaway databases such as the test suite's can pass journal_mode="MEMORY", synchronous="OFF".
+# The read-only range connection gets the same settings; the journal mode is stored in the file.
+_JOURNAL_MODES = frozenset({"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"})
+_SYNCHRONOUS_MODES = frozenset({"OFF", "NORMAL", "FULL", "EXTRA"})
+_SQL_CONNECTION_PRAGMAS = """
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+"""
+
+_SQL_GET_STATE = "SELECT value FROM sync_state WHERE key = ?"
+_SQL_DATA_VERSION = "PRAGMA data_version"
+_SQL_SET_STATE = """
+INSERT INTO sync_state(key, value)
+VALUES(?, ?)
+ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+_SQL_SELECT_PROCESSED_IDS = "SELECT history_id FROM processed_events"
+# The candidate ids travel as one JSON array, so the statement text never changes with the id count
+# (one cached prepared statement) and no bound-parameter limit applies.
+_SQL_SELECT_PROCESSED_AMONG = """
+SELECT history_id FROM processed_events
+WHERE history_id IN (SELECT value FROM json_each(?))
+"""
+_SQL_INSERT_PROCESSED_EVENT = """
+INSERT INTO processed_events(
+    history_id,
+    watched_at_us,
+    media_type,
+    trakt_id,
+    title_key,
+    runtime_min,
+    is_rewatch,
+    show_trakt_id,
+    season_number,
+    episode_number,
+    year,
+    title,
+    show_title
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(history_id) DO NOTHING
+"""
+_SQL_INSERT_DEAD_LETTER = """
+INSERT INTO dead_letters(history_id, payload_json, error, created_at)
+VALUES (?, ?, ?, ?)
+"""
+_SQL_SELECT_EVENT_ROWS_IN_RANGE = """
+SELECT history_id, watched_at_us, media_type, title_key, runtime_min, is_rewatch
+FROM processed_events INDEXED BY idx_processed_events_range
+WHERE watched_at_us >= ? AND watched_at_us < ?
+ORDER BY watched_at_us ASC, history_id ASC
+"""
+_SQL_SELECT_WATCH_EVENTS_IN_RANGE = """
+SELECT
+    history_id,
+    watched_at_us,
+    media_type,
+    trakt_id,
+    show_trakt_id,
+    season_number,
+    episode_number,
+    runtime_min,
+    year,
+    title,
+    show_title,
+    is_rewatch
+FROM processed_events INDEXED BY idx_processed_events_range
+WHERE watched_at_us >= ? AND watched_at_us < ?
+ORDER BY watched_at_us ASC, history_id ASC
+"""
+_SQL_CREATE_DELETE_IDS = "CREATE TEMP TABLE IF NOT EXISTS _del_ids(id INTEGER PRIMARY KEY)"
+_SQL_CLEAR_DELETE_IDS = "DELETE FROM _del_ids"
+_SQL_INSERT_DELETE_ID = "INSERT OR IGNORE INTO _del_ids(id) VALUES (?)"
+_SQL_DELETE_STAGED_IDS = """
+DELETE FROM processed_events
+WHERE history_id IN (SELECT id FROM _del_ids)
+RETURNING history_id, watched_at_us, media_type, title_key, runtime_min, is_rewatch
+"""
+_SQL_CREATE_REMOTE_IDS = "CREATE TEMP TABLE IF NOT EXISTS _remote_ids(id INTEGER PRIMARY KEY)"
+_SQL_CLEAR_REMOTE_IDS = "DELETE FROM _remote_ids"
+_SQL_INSERT_REMOTE_ID = "INSERT OR IGNORE INTO _remote_ids(id) VALUES (?)"
+_SQL_SELECT_MISSING_IDS_IN_RANGE = """
+SELECT history_id
+FROM processed_events INDEXED BY idx_processed_events_range
+WHERE watched_at_us >= ? AND watched_at_us < ?
+  AND history_id NOT IN (SELECT id FROM _remote_ids)
+"""
+
+
+@dataclass(frozen=True, slots=True)
 class ProcessedEventRow:
     history_id: int
     watched_at: datetime
@@ -21,18 +130,52 @@ class ProcessedEventRow:
 
 
 class StateStore:
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, journal_mode: str = "WAL", synchronous: str = "NORMAL") -> None:
+        journal_mode = journal_mode.upper()
+        synchronous = synchronous.upper()
+        if journal_mode not in _JOURNAL_MODES:
+            raise RuntimeError(f"Unsupported SQLite journal_mode: {journal_mode}")
+        if synchronous not in _SYNCHRONOUS_MODES:
+            raise RuntimeError(f"Unsupported SQLite synchronous mode: {synchronous}")
+
         self._db_path = Path(db_path)
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+        # isolation_level=None: the driver never opens transactions on its own; transaction() owns every BEGIN/COMMIT.
+        self._conn = sqlite3.connect(
+            str(self._db_path),
+            timeout=_BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256,
+        )
         self._conn.row_factory = sqlite3.Row
+        # Both values are checked against fixed sets above; PRAGMA arguments cannot be bound as parameters.
+        self._conn.executescript(
+            f"PRAGMA journal_mode={journal_mode}; PRAGMA synchronous={synchronous};" + _SQL_CONNECTION_PRAGMAS
+        )
+        self._state_cache: dict[str, str | None] = {}
+        self._data_version: int | None = None
+        self._transaction_depth = 0
+        self._processed_ids: set[int] | None = None
+        self._reader: sqlite3.Connection | None = None
+        # Only WAL lets a reader hold a snapshot without blocking commits, and only a real file can be reopened.
+        self._use_reader = journal_mode == "WAL" and db_path != ":memory:"
+        self._closed = False
         self._init_schema()
 
+    def __enter__(self) -> StateStore:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
     def _init_schema(self) -> None:
+        schema_version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if schema_version == _CURRENT_SCHEMA_VERSION:
+            return
+
         self._conn.executescript(
             """
-            PRAGMA journal_mode=WAL;
-
             CREATE TABLE IF NOT EXISTS sync_state (
                 key TEXT PRIMARY KEY,
                 value TEXT NOT NULL
@@ -40,7 +183,7 @@ class StateStore:
 
             CREATE TABLE IF NOT EXISTS processed_events (
                 history_id INTEGER PRIMARY KEY,
-                watched_at TEXT NOT NULL,
+                watched_at_us INTEGER NOT NULL,
                 media_type TEXT NOT NULL,
                 trakt_id INTEGER NOT NULL,
                 title_key TEXT NOT NULL,
@@ -54,9 +197,6 @@ class StateStore:
                 show_title TEXT
             );
 
-            CREATE INDEX IF NOT EXISTS idx_processed_events_watched_at
-                ON processed_events(watched_at);
-
             CREATE TABLE IF NOT EXISTS dead_letters (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 history_id INTEGER,
@@ -66,8 +206,18 @@ class StateStore:
             );
             """
         )
-        self._ensure_processed_events_columns()
-        self._conn.commit()
+        with self.transaction():
+            self._ensure_processed_events_columns()
+            self._migrate_watched_at_to_epoch_us()
+            # Covers fetch_events_in_range entirely and serves both range queries in ORDER BY order.
+            self._conn.execute("DROP INDEX IF EXISTS idx_processed_events_watched_at_us")
+            self._conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_processed_events_range
+                    ON processed_events(watched_at_us, history_id, media_type, title_key, runtime_min, is_rewatch)
+                """
+            )
+            self._conn.execute(f"PRAGMA user_version = {_CURRENT_SCHEMA_VERSION}")
 
     def _ensure_processed_events_columns(self) -> None:
         columns = {
@@ -86,23 +236,146 @@ class StateStore:
             if column_name not in columns:
                 self._conn.execute(statement)
 
+    def _migrate_watched_at_to_epoch_us(self) -> None:
+        """Rebuild processed_events from the legacy ISO-8601 watched_at column into watched_at_us."""
+        columns = {
+            str(row["name"])
+            for row in self._conn.execute("PRAGMA table_info(processed_events)").fetchall()
+        }
+        if "watched_at_us" in columns:
+            return
+
+        self._conn.create_function("_iso_to_epoch_us", 1, _iso_to_epoch_us, deterministic=True)
+        with self.transaction():
+            self._conn.execute(
+                """
+                CREATE TABLE processed_events_new (
+                    history_id INTEGER PRIMARY KEY,
+                    watched_at_us INTEGER NOT NULL,
+                    media_type TEXT NOT NULL,
+                    trakt_id INTEGER NOT NULL,
+                    title_key TEXT NOT NULL,
+                    runtime_min REAL NOT NULL,
+                    is_rewatch INTEGER NOT NULL,
+                    show_trakt_id INTEGER,
+                    season_number INTEGER,
+                    episode_number INTEGER,
+                    year INTEGER,
+                    title TEXT,
+                    show_title TEXT
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                INSERT INTO processed_events_new(
+                    history_id,
+                    watched_at_us,
+                    media_type,
+                    trakt_id,
+                    title_key,
+                    runtime_min,
+                    is_rewatch,
+                    show_trakt_id,
+                    season_number,
+                    episode_number,
+                    year,
+                    title,
+                    show_title
+                )
+                SELECT
+                    history_id,
+                    _iso_to_epoch_us(watched_at),
+                    media_type,
+                    trakt_id,
+                    title_key,
+                    runtime_min,
+                    is_rewatch,
+                    show_trakt_id,
+                    season_number,
+                    episode_number,
+                    year,
+                    title,
+                    show_title
+                FROM processed_events
+                """
+            )
+            self._conn.execute("DROP TABLE processed_events")
+            self._conn.execute("ALTER TABLE processed_events_new RENAME TO processed_events")
+
     def close(self) -> None:
-        self._conn.close()
+        """Close both connections; calling it again is a no-op."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            # Lets SQLite refresh planner statistics (ANALYZE) for tables whose shape changed while this connection was open.
+            self._conn.execute("PRAGMA optimize")
+        except sqlite3.Error as error:
+            # Best effort only; raising here would also mask whatever exception is already unwinding through close().
+            _LOGGER.warning("state_store_optimize_failed", extra={"error": str(error)})
+        finally:
+            reader, self._reader = self._reader, None
+            try:
+                self._conn.close()
+            finally:
+                if reader is not None:
+                    reader.close()
+
+    def checkpoint(self) -> None:
+        """Fold the WAL back into the main database file and truncate it, e.g. after a large backfill."""
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group writes into one BEGIN IMMEDIATE ... COMMIT; nested calls join the outer transaction."""
+        if self._transaction_depth:
+            self._transaction_depth += 1
+            try:
+                yield
+            finally:
+                self._transaction_depth -= 1
+            return
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._transaction_depth = 1
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            # In-memory mirrors may hold writes that were just discarded; reload them lazily.
+            self._processed_ids = None
+            self._state_cache.clear()
+            raise
+        else:
+            self._conn.execute("COMMIT")
+        finally:
+            self._transaction_depth = 0
 
     def get_state(self, key: str) -> str | None:
-        row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
-        return str(row["value"]) if row else None
+        # --auth, --once or --backfill may write the same file while the service runs. data_version changes only
+        # when another connection commits, so cached values are dropped exactly when they may have gone stale.
+        data_version = self._conn.execute(_SQL_DATA_VERSION).fetchone()[0]
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._state_cache.clear()
+        try:
+            return self._state_cache[key]
+        except KeyError:
+            pass
+        row = self._conn.execute(_SQL_GET_STATE, (key,)).fetchone()
+        value = str(row["value"]) if row else None
+        self._state_cache[key] = value
+        return value
 
     def set_state(self, key: str, value: str) -> None:
-        self._conn.execute(
-            """
-            INSERT INTO sync_state(key, value)
-            VALUES(?, ?)
-            ON CONFLICT(key) DO UPDATE SET value = excluded.value
-            """,
-            (key, value),
-        )
-        self._conn.commit()
+        self.set_states({key: value})
+
+    def set_states(self, values: dict[str, str]) -> None:
+        """Upsert several keys with one executemany of the cached upsert statement, in one transaction."""
+        with self.transaction():
+            self._conn.executemany(_SQL_SET_STATE, values.items())
+            self._state_cache.update(values)
 
     def get_backfill_completed(self) -> bool:
         return self.get_state("backfill_completed") == "1"
@@ -128,192 +401,260 @@ class StateStore:
         return cursor_dt, cursor_id
 
     def set_cursor(self, watched_at: datetime, history_id: int) -> None:
-        self.set_state("last_watched_at", watched_at.astimezone(timezone.utc).isoformat())
-        self.set_state("last_history_id", str(history_id))
+        self.set_states(
+            {
+                "last_watched_at": watched_at.astimezone(timezone.utc).isoformat(),
+                "last_history_id": str(history_id),
+            }
+        )
 
     def has_processed(self, history_id: int) -> bool:
-        row = self._conn.execute(
-            "SELECT 1 FROM processed_events WHERE history_id = ?", (history_id,)
-        ).fetchone()
-        return row is not None
+        return history_id in self._known_processed_ids()
+
+    def filter_unprocessed(self, history_ids: Iterable[int]) -> set[int]:
+        pending = set(history_ids)
+        if not pending:
+            return pending
+        if self._processed_ids is not None:
+            return pending - self._processed_ids
+
+        rows = self._tuple_cursor().execute(
+            _SQL_SELECT_PROCESSED_AMONG,
+            (orjson.dumps(list(pending)).decode(),),
+        ).fetchall()
+        pending.difference_update(row[0] for row in rows)
+        return pending
+
+    def preload_processed_ids(self) -> None:
+        """Load every stored history id into memory so membership checks stop touching SQLite."""
+        self._known_processed_ids()
+
+    def _known_processed_ids(self) -> set[int]:
+        if self._processed_ids is None:
+            self._processed_ids = {
+                int(row[0]) for row in self._conn.execute(_SQL_SELECT_PROCESSED_IDS)
+            }
+        return self._processed_ids
 
     def mark_processed_many(self, events: Iterable[WatchEvent]) -> None:
-        rows = [
-            (
-                event.history_id,
-                event.watched_at.astimezone(timezone.utc).isoformat(),
-                event.media_type,
-                event.trakt_id,
-                event.title_key,
-                event.runtime_min,
-                int(event.is_rewatch),
-                event.show_trakt_id,
-                event.season_number,
-                event.episode_number,
-                event.year,
-                event.title,
-                event.show_title,
-            )
-            for event in events
-        ]
-        if not rows:
+        rows = map(_watch_event_to_row, events)
+        chunk = list(islice(rows, _INSERT_CHUNK_SIZE))
+        if not chunk:
             return
 
-        self._conn.executemany(
-            """
-            INSERT INTO processed_events(
-                history_id,
-                watched_at,
-                media_type,
-                trakt_id,
-                title_key,
-                runtime_min,
-                is_rewatch,
-                show_trakt_id,
-                season_number,
-                episode_number,
-                year,
-                title,
-                show_title
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(history_id) DO NOTHING
-            """,
-            rows,
-        )
-        self._conn.commit()
+        with self.transaction():
+            while chunk:
+                self._conn.executemany(_SQL_INSERT_PROCESSED_EVENT, chunk)
+                if self._processed_ids is not None:
+                    self._processed_ids.update(row[0] for row in chunk)
+                chunk = list(islice(rows, _INSERT_CHUNK_SIZE))
 
     def record_dead_letter(self, history_id: int | None, payload: dict, error: str) -> None:
-        self._conn.execute(
-            """
-            INSERT INTO dead_letters(history_id, payload_json, error, created_at)
-            VALUES (?, ?, ?, ?)
-            """,
-            (
-                history_id,
-                json.dumps(payload, ensure_ascii=True),
-                error,
-                datetime.now(timezone.utc).isoformat(),
-            ),
-        )
-        self._conn.commit()
+        with self.transaction():
+            self._conn.execute(
+                _SQL_INSERT_DEAD_LETTER,
+                (
+                    history_id,
+                    orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode(),
+                    error,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
 
     def fetch_events_in_range(
         self,
         start_inclusive_utc: datetime,
         end_exclusive_utc: datetime,
     ) -> list[ProcessedEventRow]:
-        rows = self._conn.execute(
-            """
-            SELECT history_id, watched_at, media_type, title_key, runtime_min, is_rewatch
-            FROM processed_events
-            WHERE watched_at >= ? AND watched_at < ?
-            ORDER BY watched_at ASC, history_id ASC
-            """,
-            (
-                start_inclusive_utc.astimezone(timezone.utc).isoformat(),
-                end_exclusive_utc.astimezone(timezone.utc).isoformat(),
-            ),
+        cursor = self._range_cursor()
+        cursor.row_factory = _row_to_processed_event
+        return cursor.execute(
+            _SQL_SELECT_EVENT_ROWS_IN_RANGE,
+            (_to_epoch_us(start_inclusive_utc), _to_epoch_us(end_exclusive_utc)),
         ).fetchall()
 
-        return [_row_to_processed_event(row) for row in rows]
-
     def fetch_watch_events_in_range(
         self,
         start_inclusive_utc: datetime,
         end_exclusive_utc: datetime,
     ) -> list[WatchEvent]:
-        rows = self._conn.execute(
-            """
-            SELECT
-                history_id,
-                watched_at,
-                media_type,
-                trakt_id,
-                show_trakt_id,
-                season_number,
-                episode_number,
-                runtime_min,
-                year,
-                title,
-                show_title,
-                is_rewatch
-            FROM processed_events
-            WHERE watched_at >= ? AND watched_at < ?
-            ORDER BY watched_at ASC, history_id ASC
-            """,
-            (
-                start_inclusive_utc.astimezone(timezone.utc).isoformat(),
-                end_exclusive_utc.astimezone(timezone.utc).isoformat(),
-            ),
-        ).fetchall()
+        with self.scan_watch_events_in_range(start_inclusive_utc, end_exclusive_utc) as events:
+            return list(events)
 
-        return [_row_to_watch_event(row) for row in rows]
+    @contextmanager
+    def scan_watch_events_in_range(
+        self,
+        start_inclusive_utc: datetime,
+        end_exclusive_utc: datetime,
+    ) -> Iterator[Iterator[WatchEvent]]:
+        """
+        Stream the range's events in chunks; the cursor is closed when the block exits.
+
+        An open scan on the read-only connection pins its WAL snapshot, hiding later commits from other
+        range reads and keeping wal_checkpoint(TRUNCATE) from emptying the WAL, so it must not outlive the block.
+        """
+        cursor = self._range_cursor()
+        cursor.row_factory = _row_to_watch_event
+        cursor.arraysize = _FETCH_CHUNK_SIZE
+        try:
+            cursor.execute(
+                _SQL_SELECT_WATCH_EVENTS_IN_RANGE,
+                (_to_epoch_us(start_inclusive_utc), _to_epoch_us(end_exclusive_utc)),
+            )
+            yield _iter_fetchmany(cursor)
+        finally:
+            cursor.close()
+
+    def _tuple_cursor(self) -> sqlite3.Cursor:
+        # Bulk reads unpack plain tuples positionally; sqlite3.Row stays the default for one-off lookups.
+        cursor = self._conn.cursor()
+        cursor.row_factory = None
+        return cursor
+
+    def _range_cursor(self) -> sqlite3.Cursor:
+        """
+        Return a tuple cursor for range scans on a lazily opened read-only connection.
+
+        A streamed scan then holds its WAL snapshot on that connection instead of on the writer.
+        Inside an open transaction the writer is used, so the scan sees the transaction's own rows; so is any
+        non-WAL or in-memory database, where a second connection would block commits or open a different database.
+        """
+        if self._transaction_depth or not self._use_reader:
+            return self._tuple_cursor()
+        if self._reader is None:
+            self._reader = sqlite3.connect(
+                f"{self._db_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                timeout=_BUSY_TIMEOUT_SECONDS,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            self._reader.executescript(_SQL_CONNECTION_PRAGMAS)
+        return self._reader.cursor()
+
+    def find_missing_history_ids(
+        self,
+        start_inclusive_utc: datetime,
+        end_exclusive_utc: datetime,
+        present_history_ids: Iterable[int],
+    ) -> set[int]:
+        """Return the stored history ids in the range that are not among `present_history_ids`."""
+        with self.transaction():
+            self._conn.execute(_SQL_CREATE_REMOTE_IDS)
+            self._conn.execute(_SQL_CLEAR_REMOTE_IDS)
+            self._conn.executemany(_SQL_INSERT_REMOTE_ID, ((history_id,) for history_id in present_history_ids))
+            rows = self._tuple_cursor().execute(
+                _SQL_SELECT_MISSING_IDS_IN_RANGE,
+                (_to_epoch_us(start_inclusive_utc), _to_epoch_us(end_exclusive_utc)),
+            ).fetchall()
+            self._conn.execute(_SQL_CLEAR_REMOTE_IDS)
+
+        return {row[0] for row in rows}
 
     def delete_processed_history_ids(self, history_ids: set[int]) -> list[ProcessedEventRow]:
-        ids = tuple(sorted(history_ids))
-        if not ids:
+        if not history_ids:
             return []
 
-        placeholders = _build_placeholders(len(ids))
-        rows = self._conn.execute(
-            f"""
-            SELECT history_id, watched_at, media_type, title_key, runtime_min, is_rewatch
-            FROM processed_events
-            WHERE history_id IN ({placeholders})
-            """,
-            ids,
-        ).fetchall()
-
-        self._conn.execute(
-            f"DELETE FROM processed_events WHERE history_id IN ({placeholders})",
-            ids,
-        )
-        self._conn.commit()
-
-        return [_row_to_processed_event(row) for row in rows]
-
-
-def _build_placeholders(count: int) -> str:
-    return ",".join(["?"] * count)
+        with self.transaction():
+            # Stage the ids in a temp table so the statements stay fixed regardless of how many ids are passed.
+            self._conn.execute(_SQL_CREATE_DELETE_IDS)
+            self._conn.execute(_SQL_CLEAR_DELETE_IDS)
+            self._conn.executemany(_SQL_INSERT_DELETE_ID, ((history_id,) for history_id in history_ids))
+            cursor = self._conn.cursor()
+            cursor.row_factory = _row_to_processed_event
+            rows = cursor.execute(_SQL_DELETE_STAGED_IDS).fetchall()
+            self._conn.execute(_SQL_CLEAR_DELETE_IDS)
+            if self._processed_ids is not None:
+                self._processed_ids.difference_update(history_ids)
+
+        # RETURNING yields rows in no particular order.
+        rows.sort(key=attrgetter("history_id"))
+        return rows
+
+
+def _iter_fetchmany(cursor: sqlite3.Cursor) -> Iterator:
+    while chunk := cursor.fetchmany():
+        yield from chunk
+
+
+def _watch_event_to_row(event: WatchEvent) -> tuple:
+    return (
+        event.history_id,
+        _to_epoch_us(event.watched_at),
+        event.media_type,
+        event.trakt_id,
+        event.title_key,
+        event.runtime_min,
+        int(event.is_rewatch),
+        event.show_trakt_id,
+        event.season_number,
+        event.episode_number,
+        event.year,
+        event.title,
+        event.show_title,
+    )
 
 
-def _row_to_processed_event(row: sqlite3.Row) -> ProcessedEventRow:
+# The _row_to_* helpers are cursor row factories: sqlite3 calls them with (cursor, row) while fetching,
+# so result rows become model objects without an intermediate tuple list. Arguments stay positional.
+def _row_to_processed_event(cursor: sqlite3.Cursor, row: tuple) -> ProcessedEventRow:
+    history_id, watched_at_us, media_type, title_key, runtime_min, is_rewatch = row
     return ProcessedEventRow(
-        history_id=int(row["history_id"]),
-        watched_at=_parse_datetime(str(row["watched_at"])),
-        media_type=str(row["media_type"]),
-        title_key=str(row["title_key"]),
-        runtime_min=float(row["runtime_min"]),
-        is_rewatch=bool(int(row["is_rewatch"])),
+        history_id,
+        _from_epoch_us(watched_at_us),
+        media_type,
+        title_key,
+        runtime_min,
+        bool(is_rewatch),
     )
 
 
-def _row_to_watch_event(row: sqlite3.Row) -> WatchEvent:
-    title_raw = row["title"]
-    show_title_raw = row["show_title"]
+def _row_to_watch_event(cursor: sqlite3.Cursor, row: tuple) -> WatchEvent:
+    (
+        history_id,
+        watched_at_us,
+        media_type,
+        trakt_id,
+        show_trakt_id,
+        season_number,
+        episode_number,
+        runtime_min,
+        year,
+        title,
+        show_title,
+        is_rewatch,
+    ) = row
     return WatchEvent(
-        history_id=int(row["history_id"]),
-        watched_at=_parse_datetime(str(row["watched_at"])),
-        media_type=str(row["media_type"]),
-        trakt_id=int(row["trakt_id"]),
-        show_trakt_id=_int_or_none(row["show_trakt_id"]),
-        season_number=_int_or_none(row["season_number"]),
-        episode_number=_int_or_none(row["episode_number"]),
-        runtime_min=float(row["runtime_min"]),
-        year=_int_or_none(row["year"]),
-        title=str(title_raw) if title_raw else "Unknown",
-        show_title=str(show_title_raw) if show_title_raw else None,
-        is_rewatch=bool(int(row["is_rewatch"])),
+        history_id,
+        _from_epoch_us(watched_at_us),
+        media_type,
+        trakt_id,
+        show_trakt_id,
+        season_number,
+        episode_number,
+        runtime_min,
+        year,
+        title or "Unknown",
+        show_title or None,
+        bool(is_rewatch),
     )
 
 
-def _int_or_none(value: object) -> int | None:
-    if value is None:
-        return None
-    return int(value)
+def _to_epoch_us(value: datetime) -> int:
+    return (value - _EPOCH) // _ONE_MICROSECOND
+
+
+def _from_epoch_us(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _iso_to_epoch_us(value: str) -> int:
+    return _to_epoch_us(_parse_datetime(value))
 
 
 def _parse_datetime(value: str) -> datetime:
     if value.endswith("Z"):
-        value = value[:-1] + "+00:00"
-    return datetime.fromisoformat(value).astimezone(timezone.utc)
+        return datetime.fromisoformat(value[:-1]).replace(tzinfo=timezone.utc)
+    parsed = datetime.fromisoformat(value)
+    # A "+00:00" suffix already parses to the timezone.utc singleton; only convert other offsets.
+    return parsed if parsed.tzinfo is timezone.utc else parsed.astimezone(timezone.utc)
@@ -1,17 +1,42 @@
 from __future__ import annotations
 
 import logging
+import queue
 import sys
+import threading
+from collections.abc import Iterator
+from contextlib import ExitStack, closing
+from functools import lru_cache
 from datetime import date, datetime, time, timedelta, timezone
+from itertools import chain, islice
+from time import monotonic
+from typing import TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
 from trakt_tracker.aggregator import build_daily_aggregates
 from trakt_tracker.config import Settings
-from trakt_tracker.influx_writer import InfluxWriter
 from trakt_tracker.models import WatchEvent, parse_watch_event
-from trakt_tracker.state_store import StateStore
+from trakt_tracker.state_store import ProcessedEventRow, StateStore
 from trakt_tracker.trakt_client import TraktClient
 
+if TYPE_CHECKING:
+    from trakt_tracker.influx_writer import InfluxWriter
+
+# One duplicate probe per Trakt page (default page size).
+_PROBE_BATCH_SIZE = 100
+# History payloads are handed from the fetch thread in chunks of one page, at most this many chunks ahead.
+_HANDOFF_CHUNK_SIZE = 100
+_HANDOFF_QUEUE_SIZE = 4
+# Reconcile deletes each removed event's one-second slot from Influx up to this many slots, whole days beyond.
+_TARGETED_DELETE_LIMIT = 25
+_ONE_SECOND = timedelta(seconds=1)
+# Local days memoized per 15-minute UTC slot; 4096 slots cover about six weeks of chronologically ordered events.
+_LOCAL_DAY_SLOT_SECONDS = 900
+_LOCAL_DAY_CACHE_SIZE = 4096
+
+# Progress bar redraws are capped at 10 Hz; the last page is always drawn.
+_PROGRESS_RENDER_INTERVAL_SECONDS = 0.1
+
 
 class SyncEngine:
     def __init__(
@@ -28,12 +53,15 @@ class SyncEngine:
         self._state = state_store
         self._logger = logger
         self._timezone = ZoneInfo(settings.timezone)
+        self._local_day = _LocalDayResolver(self._timezone)
 
     def run_backfill(self, force: bool = False) -> dict:
         if self._state.get_backfill_completed() and not force:
             self._logger.info("backfill_already_completed")
             return {"status": "skipped", "reason": "already_completed"}
 
+        # A backfill probes every id in the history, so one full id scan beats thousands of IN lookups.
+        self._state.preload_processed_ids()
         try:
             stats, _, _ = self._run_sync_window(
                 job_name="backfill",
@@ -79,15 +107,15 @@ class SyncEngine:
             )
 
             deleted_events = 0
-            deleted_days_count = 0
+            raw_seconds_rewritten = 0
+            raw_days_rewritten = 0
             parse_errors = int(stats.get("parse_errors", 0))
             if parse_errors == 0 and remote_history_ids is not None:
-                deleted_events, deleted_days = self._reconcile_hard_deletes(
+                deleted_events, raw_seconds_rewritten, raw_days_rewritten = self._reconcile_hard_deletes(
                     start_at=start_at,
                     end_at=end_at,
                     remote_history_ids=remote_history_ids,
                 )
-                deleted_days_count = len(deleted_days)
             elif parse_errors > 0:
                 self._logger.warning(
                     "reconcile_skip_hard_delete_due_parse_errors",
@@ -95,7 +123,8 @@ class SyncEngine:
                 )
 
             stats["events_deleted"] = deleted_events
-            stats["days_rewritten_raw"] = deleted_days_count
+            stats["raw_seconds_rewritten"] = raw_seconds_rewritten
+            stats["raw_days_rewritten"] = raw_days_rewritten
 
             # Rebuild aggregates for the full rolling window to keep dashboard values deterministic.
             self._rebuild_aggregates_for_days(self._recent_local_days(self._settings.reconcile_days))
@@ -117,9 +146,10 @@ class SyncEngine:
         duplicates = 0
         parse_errors = 0
 
+        pending: list[WatchEvent] = []
         batch: list[WatchEvent] = []
         affected_days: set[date] = set()
-        cursor_candidate: WatchEvent | None = None
+        cursor_key: tuple[datetime, int] | None = None
         remote_history_ids = set() if collect_remote_history_ids else None
         progress = _SyncProgress(job_name=job_name)
 
@@ -132,37 +162,47 @@ class SyncEngine:
             },
         )
 
-        for payload in self._trakt.iter_history(
+        history = self._trakt.iter_history(
             start_at=start_at,
             end_at=end_at,
             page_callback=progress.on_page_loaded,
-        ):
-            fetched += 1
-
-            try:
-                event = parse_watch_event(payload)
-            except Exception as error:  # noqa: BLE001
-                parse_errors += 1
-                history_id = payload.get("id") if isinstance(payload, dict) else None
-                self._state.record_dead_letter(history_id=history_id, payload=payload, error=str(error))
-                continue
-
-            if remote_history_ids is not None:
-                remote_history_ids.add(event.history_id)
-
-            cursor_candidate = _latest_event(cursor_candidate, event)
-
-            if self._state.has_processed(event.history_id):
-                duplicates += 1
-                continue
-
-            batch.append(event)
-            affected_days.add(event.watched_at.astimezone(self._timezone).date())
-
-            if len(batch) >= 250:
-                self._flush_batch(batch)
-                inserted += len(batch)
-                batch.clear()
+        )
+        # Closing the handoff on any exit (e.g. a failed flush) stops the fetch thread instead of leaving it
+        # blocked on the full queue until garbage collection.
+        with closing(_iter_in_background(history)) as payloads:
+            for payload in payloads:
+                fetched += 1
+
+                try:
+                    event = parse_watch_event(payload)
+                except Exception as error:  # noqa: BLE001
+                    parse_errors += 1
+                    history_id = payload.get("id") if isinstance(payload, dict) else None
+                    self._state.record_dead_letter(history_id=history_id, payload=payload, error=str(error))
+                    continue
+
+                if remote_history_ids is not None:
+                    remote_history_ids.add(event.history_id)
+
+                # (watched_at, history_id) tuples compare in C, matching the cursor's tie-break on history_id.
+                event_key = (event.watched_at, event.history_id)
+                if cursor_key is None or event_key > cursor_key:
+                    cursor_key = event_key
+
+                pending.append(event)
+                if len(pending) < _PROBE_BATCH_SIZE:
+                    continue
+
+                duplicates += self._stage_unprocessed(pending, batch, affected_days)
+                pending.clear()
+
+                if len(batch) >= self._settings.influx_batch_size:
+                    self._flush_batch(batch)
+                    inserted += len(batch)
+                    batch.clear()
+
+        if pending:
+            duplicates += self._stage_unprocessed(pending, batch, affected_days)
 
         if batch:
             self._flush_batch(batch)
@@ -171,12 +211,12 @@ class SyncEngine:
         if affected_days:
             self._rebuild_aggregates_for_days(affected_days)
 
-        if update_cursor and cursor_candidate is not None:
-            self._state.set_cursor(cursor_candidate.watched_at, cursor_candidate.history_id)
-
         finished = datetime.now(timezone.utc)
         duration_ms = int((finished - started).total_seconds() * 1000)
-        self._state.set_state("last_successful_run", finished.isoformat())
+        with self._state.transaction():
+            if update_cursor and cursor_key is not None:
+                self._state.set_cursor(*cursor_key)
+            self._state.set_state("last_successful_run", finished.isoformat())
 
         stats = {
             "job_name": job_name,
@@ -191,26 +231,56 @@ class SyncEngine:
         self._logger.info("sync_finished", extra=stats)
         return stats, affected_days, remote_history_ids
 
+    def _stage_unprocessed(
+        self,
+        pending: list[WatchEvent],
+        batch: list[WatchEvent],
+        affected_days: set[date],
+    ) -> int:
+        """Move the not-yet-stored events of `pending` into `batch` and return how many were duplicates."""
+        unseen = self._state.filter_unprocessed(event.history_id for event in pending)
+        staged = 0
+        for event in pending:
+            if event.history_id not in unseen:
+                continue
+            batch.append(event)
+            affected_days.add(self._local_day(event.watched_at))
+            staged += 1
+        return len(pending) - staged
+
     def _flush_batch(self, events: list[WatchEvent]) -> None:
         self._influx.write_watch_events(events)
         self._state.mark_processed_many(events)
 
     def _rebuild_aggregates_for_days(self, days: set[date]) -> None:
         all_aggregates = []
-        for local_day in sorted(days):
-            day_start_local = datetime.combine(local_day, time.min, tzinfo=self._timezone)
-            day_end_local = day_start_local + timedelta(days=1)
-
-            day_start_utc = day_start_local.astimezone(timezone.utc)
-            day_end_utc = day_end_local.astimezone(timezone.utc)
-            rows = self._state.fetch_events_in_range(day_start_utc, day_end_utc)
-
-            aggregates = build_daily_aggregates(rows=rows, day_start_utc=day_start_utc)
-            all_aggregates.extend(aggregates)
+        # One range query per run of consecutive days, split back into local days in Python.
+        for run in _consecutive_day_runs(days):
+            boundaries = self._day_boundaries_utc(run)
+            rows_by_day: dict[date, list[ProcessedEventRow]] = {}
+            for row in self._state.fetch_events_in_range(boundaries[0], boundaries[-1]):
+                rows_by_day.setdefault(self._local_day(row.watched_at), []).append(row)
+
+            for local_day, day_start_utc in zip(run, boundaries):
+                rows = rows_by_day.get(local_day)
+                if rows:
+                    all_aggregates.extend(build_daily_aggregates(rows=rows, day_start_utc=day_start_utc))
 
         if all_aggregates:
             self._influx.write_daily_aggregates(all_aggregates)
 
+    def _day_boundaries_utc(self, run: list[date]) -> list[datetime]:
+        """
+        Return the UTC start of every day in a run of consecutive local days, plus the end of the last one.
+
+        Each day's end is the next day's start, so a run of N days costs N + 1 conversions. Offsets are
+        resolved per day rather than once per run because a run may cross a DST change.
+        """
+        return [
+            datetime.combine(local_day, time.min, tzinfo=self._timezone).astimezone(timezone.utc)
+            for local_day in (*run, run[-1] + timedelta(days=1))
+        ]
+
     def _recent_local_days(self, days: int) -> set[date]:
         now_local = datetime.now(timezone.utc).astimezone(self._timezone)
         return {now_local.date() - timedelta(days=offset) for offset in range(days)}
@@ -220,17 +290,17 @@ class SyncEngine:
         start_at: datetime,
         end_at: datetime,
         remote_history_ids: set[int],
-    ) -> tuple[int, set[date]]:
-        local_rows = self._state.fetch_events_in_range(start_at, end_at)
-        local_history_ids = {row.history_id for row in local_rows}
-        missing_history_ids = local_history_ids - remote_history_ids
+    ) -> tuple[int, int, int]:
+        """Return the number of events deleted and of raw one-second slots and whole days rewritten."""
+        missing_history_ids = self._state.find_missing_history_ids(start_at, end_at, remote_history_ids)
         if not missing_history_ids:
-            return 0, set()
+            return 0, 0, 0
 
         removed_rows = self._state.delete_processed_history_ids(missing_history_ids)
-        affected_days = {row.watched_at.astimezone(self._timezone).date() for row in removed_rows}
+        affected_days = {self._local_day(row.watched_at) for row in removed_rows}
+        raw_seconds_rewritten, raw_days_rewritten = 0, 0
         if affected_days:
-            self._rewrite_raw_events_for_days(affected_days)
+            raw_seconds_rewritten, raw_days_rewritten = self._rewrite_raw_events(removed_rows, affected_days)
 
         self._logger.info(
             "reconcile_hard_deletes_applied",
@@ -238,22 +308,42 @@ class SyncEngine:
                 "window_start": start_at.isoformat(),
                 "window_end": end_at.isoformat(),
                 "events_deleted": len(removed_rows),
-                "days_rewritten_raw": len(affected_days),
+                "raw_seconds_rewritten": raw_seconds_rewritten,
+                "raw_days_rewritten": raw_days_rewritten,
             },
         )
-        return len(removed_rows), affected_days
-
-    def _rewrite_raw_events_for_days(self, days: set[date]) -> None:
-        for local_day in sorted(days):
-            day_start_local = datetime.combine(local_day, time.min, tzinfo=self._timezone)
-            day_end_local = day_start_local + timedelta(days=1)
-
-            day_start_utc = day_start_local.astimezone(timezone.utc)
-            day_end_utc = day_end_local.astimezone(timezone.utc)
-
-            self._influx.delete_watch_events_range(day_start_utc, day_end_utc)
-            day_events = self._state.fetch_watch_events_in_range(day_start_utc, day_end_utc)
-            self._influx.write_watch_events(day_events)
+        return len(removed_rows), raw_seconds_rewritten, raw_days_rewritten
+
+    def _rewrite_raw_events(self, removed_rows: list[ProcessedEventRow], days: set[date]) -> tuple[int, int]:
+        """
+        Drop removed events from the raw bucket and re-export whatever else shared their time range.
+
+        Influx can only delete by time range and tags (history_id is a field), so each removed event is
+        cleared by deleting its one-second slot. Past _TARGETED_DELETE_LIMIT slots, whole runs of days
+        are cleared instead so the number of delete calls stays small.
+        Returns (one-second slots rewritten, whole days rewritten); one of the two is always 0.
+        """
+        seconds = {row.watched_at.replace(microsecond=0) for row in removed_rows}
+        if len(seconds) <= _TARGETED_DELETE_LIMIT:
+            ranges = [(second, second + _ONE_SECOND) for second in sorted(seconds)]
+            rewritten = (len(seconds), 0)
+        else:
+            rewritten = (0, len(days))
+            ranges = []
+            for run in _consecutive_day_runs(days):
+                boundaries = self._day_boundaries_utc(run)
+                ranges.append((boundaries[0], boundaries[-1]))
+
+        for start, end in ranges:
+            self._influx.delete_watch_events_range(start, end)
+        # Each scan is opened when the chain reaches it and all are closed when the write returns or raises.
+        with ExitStack() as scans:
+            self._influx.write_watch_events(
+                chain.from_iterable(
+                    scans.enter_context(self._state.scan_watch_events_in_range(start, end)) for start, end in ranges
+                )
+            )
+        return rewritten
 
     def _persist_trakt_refresh_token(self) -> None:
         token = self._trakt.current_refresh_token()
@@ -263,19 +353,87 @@ class SyncEngine:
 
 
 
-def _latest_event(left: WatchEvent | None, right: WatchEvent) -> WatchEvent:
-    if left is None:
-        return right
-    if right.watched_at > left.watched_at:
-        return right
-    if right.watched_at == left.watched_at and right.history_id > left.history_id:
-        return right
-    return left
+def _safe_iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
 
 
+def _iter_in_background(items: Iterator[dict]) -> Iterator[dict]:
+    """
+    Drain `items` on a worker thread so fetching the next pages overlaps processing the current one.
 
-def _safe_iso(value: datetime | None) -> str | None:
-    return value.isoformat() if value else None
+    Items are yielded in their original order. A producer exception is re-raised here, and closing
+    this generator early stops the producer and closes `items` on its own thread.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=_HANDOFF_QUEUE_SIZE)
+    stop = threading.Event()
+    done = object()
+    failure: list[BaseException] = []
+
+    def hand_over(chunk: object) -> None:
+        while not stop.is_set():
+            try:
+                chunks.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce() -> None:
+        try:
+            while not stop.is_set():
+                chunk = list(islice(items, _HANDOFF_CHUNK_SIZE))
+                if not chunk:
+                    break
+                hand_over(chunk)
+        except BaseException as error:  # noqa: BLE001 - re-raised on the consuming thread
+            failure.append(error)
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+            hand_over(done)
+
+    producer = threading.Thread(target=produce, name="trakt-history", daemon=True)
+    producer.start()
+    try:
+        while (chunk := chunks.get()) is not done:
+            yield from chunk
+        if failure:
+            raise failure[0]
+    finally:
+        stop.set()
+        producer.join()
+
+
+def _consecutive_day_runs(days: set[date]) -> list[list[date]]:
+    runs: list[list[date]] = []
+    for local_day in sorted(days):
+        if runs and local_day - runs[-1][-1] == timedelta(days=1):
+            runs[-1].append(local_day)
+        else:
+            runs.append([local_day])
+    return runs
+
+
+class _LocalDayResolver:
+    """
+    Maps UTC instants to local calendar days, memoized per 15-minute UTC slot.
+
+    Current UTC offsets and DST transitions all fall on quarter-hour boundaries, so every instant
+    inside one slot shares a local date. Keying by UTC date instead would be wrong for any non-UTC zone.
+    """
+
+    __slots__ = ("_timezone", "_day_for_slot")
+
+    def __init__(self, tz: ZoneInfo) -> None:
+        self._timezone = tz
+        # Bounded so a multi-year backfill on the long-lived engine does not keep every slot it has seen.
+        self._day_for_slot = lru_cache(maxsize=_LOCAL_DAY_CACHE_SIZE)(self._resolve_slot)
+
+    def __call__(self, value: datetime) -> date:
+        return self._day_for_slot(int(value.timestamp()) // _LOCAL_DAY_SLOT_SECONDS)
+
+    def _resolve_slot(self, slot: int) -> date:
+        return datetime.fromtimestamp(slot * _LOCAL_DAY_SLOT_SECONDS, self._timezone).date()
 
 
 class _SyncProgress:
@@ -284,11 +442,20 @@ class _SyncProgress:
         self._enabled = sys.stdout.isatty()
         self._last_rendered_len = 0
         self._last_page = 0
+        self._last_render_monotonic: float | None = None
 
     def on_page_loaded(self, page: int, page_count: int | None, total_items: int | None) -> None:
         self._last_page = page
         if not self._enabled:
             return
+        now = monotonic()
+        if (
+            self._last_render_monotonic is not None
+            and now - self._last_render_monotonic < _PROGRESS_RENDER_INTERVAL_SECONDS
+            and page != page_count
+        ):
+            return
+        self._last_render_monotonic = now
 
         items_str = f" ({total_items} items total)" if total_items is not None else ""
 
@@ -2,15 +2,26 @@ from __future__ import annotations
 
 import logging
 import random
+import threading
 import time
+from collections import deque
 from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Generator
 
 import httpx
+import orjson
 
 from trakt_tracker.config import Settings
 
+# `runtime` (the source of watch_minutes_total) is only included at extended=full; the default
+# level returns just titles, years and ids, so this cannot be dropped without losing minutes.
+_HISTORY_EXTENDED = "full"
+
+# With HTTP/2 prefetched pages multiplex over one connection; the extra slots cover HTTP/1.1 fallback.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=8, max_connections=16)
+
 
 class TraktClient:
     def __init__(
@@ -21,12 +32,25 @@ class TraktClient:
     ) -> None:
         self._settings = settings
         self._logger = logger
-        self._http = httpx.Client(base_url="https://api.trakt.tv", timeout=30.0)
+        self._http = httpx.Client(
+            base_url="https://api.trakt.tv",
+            http2=True,
+            timeout=30.0,
+            limits=_HTTP_LIMITS,
+        )
 
         self._refresh_token = refresh_token_override if refresh_token_override is not None else settings.trakt_refresh_token
         self._access_token: str | None = None
+        # Rebuilt only when the access token changes; httpx copies request headers, so sharing one dict is safe.
+        self._auth_headers: dict[str, str] | None = None
         self._access_token_expires_at: datetime = datetime.now(timezone.utc)
-        self._last_request_monotonic: float | None = None
+        # Token bucket for the optional client-side throttle: one token per min_interval, up to the burst size.
+        self._throttle_tokens = float(settings.trakt_request_burst)
+        self._throttle_refilled_monotonic = time.monotonic()
+        # Page prefetch threads share the token, the throttle gate and any 429 pause.
+        self._auth_lock = threading.Lock()
+        self._throttle_lock = threading.Lock()
+        self._rate_limited_until_monotonic = 0.0
 
     def close(self) -> None:
         self._http.close()
@@ -49,41 +73,74 @@ class TraktClient:
         per_page: int = 100,
         page_callback: Callable[[int, int | None, int | None], None] | None = None,
     ) -> Generator[dict, None, None]:
-        page = 1
-
-        while True:
-            params = {
-                "page": page,
-                "limit": per_page,
-                "extended": "full",
-            }
-            if start_at:
-                params["start_at"] = _to_trakt_iso(start_at)
-            if end_at:
-                params["end_at"] = _to_trakt_iso(end_at)
-
-            response = self._request("GET", "/sync/history", params=params)
-            payload = response.json()
-            if not isinstance(payload, list):
-                raise RuntimeError("Unexpected Trakt response format for /sync/history")
-
-            page_count = _parse_page_count(response)
-            total_items = _parse_item_count(response)
-            if not payload:
-                break
-
-            if page_callback is not None:
-                page_callback(page, page_count, total_items)
+        base_params: dict = {"limit": per_page, "extended": _HISTORY_EXTENDED}
+        if start_at:
+            base_params["start_at"] = _to_trakt_iso(start_at)
+        if end_at:
+            base_params["end_at"] = _to_trakt_iso(end_at)
+
+        payload, page_count, total_items = self._fetch_history_page(1, base_params)
+        if not payload:
+            return
+        if page_callback is not None:
+            page_callback(1, page_count, total_items)
+        yield from payload
 
-            for item in payload:
-                yield item
+        concurrency = self._settings.trakt_page_concurrency
+        if page_count is not None and page_count > 1 and concurrency > 1:
+            yield from self._iter_prefetched_pages(base_params, page_count, total_items, concurrency, page_callback)
+            return
 
+        page = 1
+        while True:
             if page_count is not None and page >= page_count:
                 break
             if page_count is None and len(payload) < per_page:
                 break
 
             page += 1
+            payload, page_count, total_items = self._fetch_history_page(page, base_params)
+            if not payload:
+                break
+            if page_callback is not None:
+                page_callback(page, page_count, total_items)
+            yield from payload
+
+    def _iter_prefetched_pages(
+        self,
+        base_params: dict,
+        page_count: int,
+        total_items: int | None,
+        concurrency: int,
+        page_callback: Callable[[int, int | None, int | None], None] | None,
+    ) -> Generator[dict, None, None]:
+        # Keep at most `concurrency` pages in flight and hand them out strictly in page order,
+        # so callers see exactly the sequence the sequential loop would produce.
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="trakt-page")
+        in_flight: deque[tuple[int, Future]] = deque()
+        next_page = 2
+        try:
+            while in_flight or next_page <= page_count:
+                while next_page <= page_count and len(in_flight) < concurrency:
+                    in_flight.append((next_page, executor.submit(self._fetch_history_page, next_page, base_params)))
+                    next_page += 1
+
+                page, future = in_flight.popleft()
+                payload, _, _ = future.result()
+                if not payload:
+                    break
+                if page_callback is not None:
+                    page_callback(page, page_count, total_items)
+                yield from payload
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _fetch_history_page(self, page: int, base_params: dict) -> tuple[list, int | None, int | None]:
+        response = self._request("GET", "/sync/history", params={"page": page, **base_params})
+        payload = orjson.loads(response.content)
+        if not isinstance(payload, list):
+            raise RuntimeError("Unexpected Trakt response format for /sync/history")
+        return payload, _parse_page_count(response), _parse_item_count(response)
 
     def _request(
         self,
@@ -97,7 +154,9 @@ class TraktClient:
 
         for attempt in range(retry_count + 1):
             self._ensure_access_token()
+            access_token = self._access_token
             headers = self._headers()
+            self._wait_for_rate_limit()
             self._throttle_requests()
 
             try:
@@ -128,7 +187,7 @@ class TraktClient:
                     "trakt_unauthorized_refreshing_token",
                     extra={"attempt": attempt + 1, "request_id": request_id},
                 )
-                self._refresh_access_token(force=True)
+                self._refresh_access_token(force=True, rejected_access_token=access_token)
                 continue
 
             if response.status_code == 429:
@@ -140,7 +199,11 @@ class TraktClient:
                     "trakt_rate_limited",
                     extra={"attempt": attempt + 1, "sleep_s": sleep_s, "request_id": request_id},
                 )
-                time.sleep(sleep_s)
+                with self._throttle_lock:
+                    self._rate_limited_until_monotonic = max(
+                        self._rate_limited_until_monotonic,
+                        time.monotonic() + sleep_s,
+                    )
                 continue
 
             if response.status_code >= 500:
@@ -170,36 +233,56 @@ class TraktClient:
         raise RuntimeError("Unreachable request retry state")
 
     def _headers(self) -> dict[str, str]:
-        if not self._access_token:
+        headers = self._auth_headers
+        if headers is None:
             raise RuntimeError("Missing Trakt access token")
+        return headers
+
+    def _build_headers(self, access_token: str) -> dict[str, str]:
         return {
             "Content-Type": "application/json",
             "User-Agent": "trakt-influx-tracker/0.1",
             "trakt-api-key": self._settings.trakt_client_id,
             "trakt-api-version": "2",
-            "Authorization": f"Bearer {self._access_token}",
+            "Authorization": f"Bearer {access_token}",
         }
 
     def _ensure_access_token(self) -> None:
         if not self._access_token or datetime.now(timezone.utc) >= self._access_token_expires_at:
             self._refresh_access_token(force=False)
 
+    def _wait_for_rate_limit(self) -> None:
+        # A 429 on any thread pauses every request until its Retry-After window has passed.
+        wait_s = self._rate_limited_until_monotonic - time.monotonic()
+        if wait_s > 0:
+            time.sleep(wait_s)
+
     def _throttle_requests(self) -> None:
         min_interval = max(0.0, self._settings.trakt_min_request_interval_seconds)
         if min_interval <= 0:
             return
 
-        now = time.monotonic()
-        if self._last_request_monotonic is not None:
-            elapsed = now - self._last_request_monotonic
-            wait_s = min_interval - elapsed
-            if wait_s > 0:
-                time.sleep(wait_s)
-        self._last_request_monotonic = time.monotonic()
-
-    def _refresh_access_token(self, force: bool) -> None:
-        if not force and self._access_token and datetime.now(timezone.utc) < self._access_token_expires_at:
-            return
+        # Take a token up front and sleep off any deficit outside the lock, so concurrent page fetches queue
+        # behind each other instead of serializing on the lock.
+        with self._throttle_lock:
+            now = time.monotonic()
+            refilled = self._throttle_tokens + (now - self._throttle_refilled_monotonic) / min_interval
+            self._throttle_tokens = min(float(self._settings.trakt_request_burst), refilled) - 1.0
+            self._throttle_refilled_monotonic = now
+            wait_s = -self._throttle_tokens * min_interval
+        if wait_s > 0:
+            time.sleep(wait_s)
+
+    def _refresh_access_token(self, force: bool, rejected_access_token: str | None = None) -> None:
+        with self._auth_lock:
+            if not force and self._access_token and datetime.now(timezone.utc) < self._access_token_expires_at:
+                return
+            if force and rejected_access_token is not None and self._access_token != rejected_access_token:
+                # Another thread already replaced the token this request was rejected with.
+                return
+            self._refresh_access_token_locked()
+
+    def _refresh_access_token_locked(self) -> None:
         if not self._refresh_token:
             raise RuntimeError("Trakt refresh token is missing. Run OAuth bootstrap first.")
 
@@ -229,6 +312,7 @@ class TraktClient:
 
         token = response.json()
         self._access_token = token["access_token"]
+        self._auth_headers = self._build_headers(self._access_token)
         expires_in = int(token.get("expires_in", 3600))
         # Refresh a little before hard expiry to reduce edge failures.
         self._access_token_expires_at = datetime.now(timezone.utc) + timedelta(seconds=max(60, expires_in - 60))
@@ -239,7 +323,7 @@ class TraktClient:
 
 
 def _to_trakt_iso(value: datetime) -> str:
-    return value.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
 def _parse_page_count(response: httpx.Response) -> int | None:
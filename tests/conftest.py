@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
+from trakt_tracker.config import Settings
+from trakt_tracker.state_store import StateStore
+
+
+@pytest.fixture
+def make_settings(tmp_path: Path) -> Callable[..., Settings]:
+    """Build Settings with test defaults (Influx disabled, state DB in tmp_path); keyword arguments override fields."""
+    defaults = Settings(
+        trakt_client_id="client",
+        trakt_client_secret="secret",
+        trakt_refresh_token="refresh",
+        trakt_auth_code=None,
+        influx_enabled=False,
+        influx_url="",
+        influx_token="",
+        influx_org="",
+        influx_bucket_raw="trakt_raw",
+        influx_bucket_agg="trakt_agg",
+        influx_batch_size=5000,
+        sync_cron="0 6,18 * * *",
+        reconcile_cron="30 3 * * *",
+        scheduler="builtin",
+        timezone="UTC",
+        overlap_hours=24,
+        reconcile_days=7,
+        state_db_path=str(tmp_path / "state.db"),
+        log_level="INFO",
+        trakt_max_retries=5,
+        trakt_retry_after_margin=0.9,
+        trakt_min_request_interval_seconds=0.0,
+        trakt_request_burst=10,
+        trakt_page_concurrency=1,
+        running_in_docker=False,
+        config_path="",
+    )
+
+    def make(**overrides: object) -> Settings:
+        return dataclasses.replace(defaults, **overrides)
+
+    return make
+
+
+@pytest.fixture
+def make_state_store(tmp_path: Path) -> Iterator[Callable[..., StateStore]]:
+    """Open a StateStore in tmp_path without WAL appends or fsyncs; a test run has nothing to keep durable."""
+    stores: list[StateStore] = []
+
+    def make(name: str = "state.db") -> StateStore:
+        store = StateStore(str(tmp_path / name), journal_mode="MEMORY", synchronous="OFF")
+        stores.append(store)
+        return store
+
+    yield make
+    # close() is idempotent, so stores a test already closed (or used as a context manager) are fine here.
+    for store in stores:
+        store.close()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from trakt_tracker.aggregator import DailyAggregate
+from trakt_tracker.influx_writer import _daily_aggregate_to_line_protocol, _watch_event_to_line_protocol
+from trakt_tracker.models import WatchEvent
+
+
+
+def test_watch_event_line_protocol_escapes_and_optional_fields() -> None:
+    event = WatchEvent(
+        history_id=101,
+        watched_at=datetime(2026, 2, 21, 21, 0, tzinfo=timezone.utc),
+        media_type="episode",
+        trakt_id=5001,
+        show_trakt_id=7001,
+        season_number=2,
+        episode_number=5,
+        runtime_min=48.0,
+        year=2023,
+        title='The "Pilot" \\ Part 1',
+        show_title="Example, Show",
+        is_rewatch=True,
+    )
+
+    line = _watch_event_to_line_protocol(event, "2026-02-22T00:00:00Z")
+
+    assert line == (
+        "watch_event,is_rewatch=true,media_type=episode,source=trakt "
+        "history_id=101i,trakt_id=5001i,runtime_min=48,"
+        'title="The \\"Pilot\\" \\\\ Part 1",ingested_at="2026-02-22T00:00:00Z",'
+        'show_trakt_id=7001i,season_number=2i,episode_number=5i,year=2023i,show_title="Example, Show" '
+        "1771707600"
+    )
+
+
+
+def test_daily_aggregate_line_protocol() -> None:
+    aggregate = DailyAggregate(
+        day_start_utc=datetime(2026, 2, 20, 0, 0, tzinfo=timezone.utc),
+        media_type="all",
+        events_count=3,
+        unique_titles_count=2,
+        watch_minutes_total=210.5,
+        rewatch_events_count=1,
+        first_watch_events_count=2,
+    )
+
+    assert _daily_aggregate_to_line_protocol(aggregate) == (
+        "watch_daily,media_type=all "
+        "events_count=3i,unique_titles_count=2i,watch_minutes_total=210.5,"
+        "rewatch_events_count=1i,first_watch_events_count=2i 1771545600"
+    )
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from trakt_tracker import main as main_module
+
+
+
+class FakeClock:
+    def __init__(self, start: datetime) -> None:
+        self.current = start
+
+    def now(self, tz=None) -> datetime:
+        return self.current.astimezone(tz) if tz else self.current
+
+    def sleep(self, seconds: float) -> None:
+        self.current += timedelta(seconds=seconds)
+
+
+class FakeEngine:
+    def __init__(self, clock: FakeClock, stop_after: int) -> None:
+        self.calls: list[tuple[str, datetime]] = []
+        self._clock = clock
+        self._stop_after = stop_after
+
+    def run_incremental(self) -> dict:
+        return self._record("incremental")
+
+    def run_reconcile(self) -> dict:
+        if not any(name == "reconcile" for name, _ in self.calls):
+            self._record("reconcile")
+            raise RuntimeError("boom")
+        return self._record("reconcile")
+
+    def _record(self, name: str) -> dict:
+        self.calls.append((name, self._clock.current))
+        self._clock.current += timedelta(seconds=5)
+        if len(self.calls) >= self._stop_after:
+            raise KeyboardInterrupt
+        return {}
+
+
+def test_cron_loop_runs_jobs_in_fire_order_and_survives_failures(make_settings, monkeypatch) -> None:
+    clock = FakeClock(datetime(2026, 2, 21, 0, 0, tzinfo=timezone.utc))
+    monkeypatch.setattr(main_module, "datetime", clock)
+    monkeypatch.setattr(main_module.time, "sleep", clock.sleep)
+    engine = FakeEngine(clock, stop_after=4)
+
+    main_module._run_cron_loop(
+        settings=make_settings(),
+        engine=engine,
+        logger=logging.getLogger("test_main"),
+    )
+
+    assert [(name, at.hour, at.minute) for name, at in engine.calls] == [
+        ("reconcile", 3, 30),
+        ("incremental", 6, 0),
+        ("incremental", 18, 0),
+        ("reconcile", 3, 30),
+    ]
+
+
+
+class PingForbiddenWriter:
+    def ping(self) -> bool:
+        raise AssertionError("header must not ping Influx when stdout is not a TTY")
+
+
+
+def test_print_header_is_plain_and_skips_ping_without_tty(make_settings, capsys) -> None:
+    settings = make_settings(influx_enabled=True, influx_url="http://influx:8086")
+
+    main_module._print_header(settings, trakt_client=None, influx_writer=PingForbiddenWriter())
+
+    output = capsys.readouterr().out
+    assert "\033[" not in output
+    assert "InfluxDB:  http://influx:8086\n" in output
+    assert "Bucket:    trakt_raw (raw) / trakt_agg (agg)" in output
@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+
+from trakt_tracker.models import WatchEvent, parse_watch_event
+
+
+def test_watch_event_precomputes_serializer_fields() -> None:
+    event = WatchEvent(
+        history_id=100,
+        watched_at=datetime(2026, 2, 21, 20, 0, tzinfo=timezone.utc),
+        media_type="movie",
+        trakt_id=999,
+        show_trakt_id=None,
+        season_number=None,
+        episode_number=None,
+        runtime_min=95,
+        year=2026,
+        title="Example Movie",
+        show_title=None,
+        is_rewatch=True,
+    )
+
+    assert type(event.runtime_min) is float
+    assert event.runtime_min == 95.0
+    assert event.is_rewatch_str == "true"
+
+
+def test_parse_watch_event_episode_payload() -> None:
+    event = parse_watch_event(
+        {
+            "id": 101,
+            "type": "episode",
+            "watched_at": "2026-02-21T21:00:00.000Z",
+            "rewatched": True,
+            "episode": {"ids": {"trakt": 5001}, "season": 2, "number": 5, "runtime": 48, "title": "Pilot"},
+            "show": {"ids": {"trakt": 7001}, "title": "Example Show", "year": 2023},
+        }
+    )
+
+    assert event.watched_at == datetime(2026, 2, 21, 21, 0, tzinfo=timezone.utc)
+    assert event.trakt_id == 5001
+    assert event.show_trakt_id == 7001
+    assert (event.season_number, event.episode_number) == (2, 5)
+    assert event.runtime_min == 48.0
+    assert event.title == "Pilot"
+    assert event.show_title == "Example Show"
+    assert event.is_rewatch is True
+    assert event.title_key == "episode:7001:s2:e5"
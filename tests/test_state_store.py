@@ -1,15 +1,269 @@
-from datetime import datetime, timezone
+import dataclasses
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
 
 from trakt_tracker.models import WatchEvent
-from trakt_tracker.state_store import StateStore
+from trakt_tracker.state_store import _SQL_SELECT_EVENT_ROWS_IN_RANGE, _SQL_SELECT_WATCH_EVENTS_IN_RANGE, StateStore
+
+
+def test_state_store_cursor_and_dedupe(make_state_store) -> None:
+    with make_state_store() as store:
+        event = WatchEvent(
+            history_id=100,
+            watched_at=datetime(2026, 2, 21, 20, 0, tzinfo=timezone.utc),
+            media_type="movie",
+            trakt_id=999,
+            show_trakt_id=None,
+            season_number=None,
+            episode_number=None,
+            runtime_min=95.0,
+            year=2026,
+            title="Example Movie",
+            show_title=None,
+            is_rewatch=False,
+        )
+        event_2 = WatchEvent(
+            history_id=101,
+            watched_at=datetime(2026, 2, 21, 21, 0, tzinfo=timezone.utc),
+            media_type="episode",
+            trakt_id=5001,
+            show_trakt_id=7001,
+            season_number=2,
+            episode_number=5,
+            runtime_min=48.0,
+            year=2023,
+            title="Example Episode",
+            show_title="Example Show",
+            is_rewatch=True,
+        )
+
+        assert store.has_processed(100) is False
+        store.mark_processed_many([event, event_2])
+        assert store.has_processed(100) is True
+
+        store.set_cursor(event.watched_at, event.history_id)
+        watched_at, history_id = store.get_cursor()
+
+        assert watched_at == event.watched_at
+        assert history_id == event.history_id
+
+        day = (datetime(2026, 2, 21, 0, 0, tzinfo=timezone.utc), datetime(2026, 2, 22, 0, 0, tzinfo=timezone.utc))
+        rows = store.fetch_events_in_range(
+            start_inclusive_utc=datetime(2026, 2, 21, 0, 0, tzinfo=timezone.utc),
+            end_exclusive_utc=datetime(2026, 2, 22, 0, 0, tzinfo=timezone.utc),
+        )
+        assert len(rows) == 2
+        assert rows[0].history_id == 100
+
+        watch_events = store.fetch_watch_events_in_range(
+            start_inclusive_utc=datetime(2026, 2, 21, 0, 0, tzinfo=timezone.utc),
+            end_exclusive_utc=datetime(2026, 2, 22, 0, 0, tzinfo=timezone.utc),
+        )
+        assert len(watch_events) == 2
+        assert watch_events[1].show_trakt_id == 7001
+        assert watch_events[1].episode_number == 5
+
+        deleted = store.delete_processed_history_ids({101})
+        assert len(deleted) == 1
+        assert deleted[0].history_id == 101
+        assert store.has_processed(101) is False
+        assert [row.history_id for row in store.fetch_events_in_range(*day)] == [100]
+
+        with store.transaction():
+            store.mark_processed_many([event_2])
+            # Inside a transaction range reads stay on the writer and see its uncommitted rows.
+            assert [row.history_id for row in store.fetch_events_in_range(*day)] == [100, 101]
+
+        assert store.get_trakt_refresh_token() is None
+        store.set_trakt_refresh_token("refresh-token-v2")
+        assert store.get_trakt_refresh_token() == "refresh-token-v2"
 
 
-def test_state_store_cursor_and_dedupe(tmp_path) -> None:
+def test_state_store_transaction_commits_once_and_rolls_back(tmp_path, make_state_store) -> None:
     db_path = tmp_path / "state.db"
-    store = StateStore(str(db_path))
+    with make_state_store() as store:
+        with store.transaction():
+            store.set_cursor(datetime(2026, 2, 21, 20, 0, tzinfo=timezone.utc), 100)
+            store.set_state("last_successful_run", "2026-02-21T20:05:00+00:00")
+
+        try:
+            with store.transaction():
+                store.set_state("last_successful_run", "2026-02-22T20:05:00+00:00")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+
+        assert store.get_state("last_successful_run") == "2026-02-21T20:05:00+00:00"
+
+    with StateStore(str(db_path)) as reopened:
+        assert reopened.get_cursor()[1] == 100
+        assert reopened.get_state("last_successful_run") == "2026-02-21T20:05:00+00:00"
+
+
+def test_state_store_filter_unprocessed(tmp_path) -> None:
+    with StateStore(str(tmp_path / "state.db")) as store:
+        events = [
+            WatchEvent(
+                history_id=history_id,
+                watched_at=datetime(2026, 2, 21, 20, 0, tzinfo=timezone.utc),
+                media_type="movie",
+                trakt_id=history_id,
+                show_trakt_id=None,
+                season_number=None,
+                episode_number=None,
+                runtime_min=90.0,
+                year=2026,
+                title="Example Movie",
+                show_title=None,
+                is_rewatch=False,
+            )
+            for history_id in range(1, 1001)
+        ]
+        store.mark_processed_many(events)
+
+        assert store.filter_unprocessed(range(995, 1006)) == {1001, 1002, 1003, 1004, 1005}
+        assert store.filter_unprocessed([]) == set()
+
+        window = (datetime(2026, 2, 21, tzinfo=timezone.utc), datetime(2026, 2, 22, tzinfo=timezone.utc))
+        assert store.find_missing_history_ids(*window, range(3, 999)) == {1, 2, 999, 1000}
+        assert store.find_missing_history_ids(datetime(2026, 2, 22, tzinfo=timezone.utc), window[1], []) == set()
+
+        store.preload_processed_ids()
+        assert store.filter_unprocessed(range(995, 1006)) == {1001, 1002, 1003, 1004, 1005}
+        assert store.has_processed(1000) is True
+
+        store.delete_processed_history_ids({1000})
+        assert store.has_processed(1000) is False
+        assert store.filter_unprocessed([999, 1000]) == {1000}
+
+        deleted = store.delete_processed_history_ids(set(range(1, 1000)) | {5000})
+        assert [row.history_id for row in deleted] == list(range(1, 1000))
+        assert store.has_processed(1) is False
+
+        store.checkpoint()
+        assert (tmp_path / "state.db-wal").stat().st_size == 0
+
+
+def test_state_store_migrates_iso_watched_at_to_epoch_us(tmp_path) -> None:
+    db_path = tmp_path / "state.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(
+        """
+        CREATE TABLE processed_events (
+            history_id INTEGER PRIMARY KEY,
+            watched_at TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            trakt_id INTEGER NOT NULL,
+            title_key TEXT NOT NULL,
+            runtime_min REAL NOT NULL,
+            is_rewatch INTEGER NOT NULL
+        );
+        CREATE INDEX idx_processed_events_watched_at ON processed_events(watched_at);
+        INSERT INTO processed_events VALUES
+            (100, '2026-02-21T20:00:00.123456+00:00', 'movie', 999, 'movie:999', 95.0, 0);
+        """
+    )
+    conn.close()
+
+    with StateStore(str(db_path)) as store:
+        rows = store.fetch_events_in_range(
+            start_inclusive_utc=datetime(2026, 2, 21, 0, 0, tzinfo=timezone.utc),
+            end_exclusive_utc=datetime(2026, 2, 22, 0, 0, tzinfo=timezone.utc),
+        )
+
+        assert len(rows) == 1
+        assert rows[0].watched_at == datetime(2026, 2, 21, 20, 0, 0, 123456, tzinfo=timezone.utc)
+        assert store.has_processed(100) is True
+
+    conn = sqlite3.connect(str(db_path))
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 3
+    conn.close()
+
+
+def test_state_store_records_dead_letter_payload(tmp_path, make_state_store) -> None:
+    db_path = tmp_path / "state.db"
+    with make_state_store() as store:
+        store.record_dead_letter(history_id=7, payload={"id": 7, "title": "Amélie"}, error="boom")
+
+    conn = sqlite3.connect(str(db_path))
+    payload_json, error = conn.execute("SELECT payload_json, error FROM dead_letters").fetchone()
+    conn.close()
+
+    assert payload_json == '{"id":7,"title":"Amélie"}'
+    assert error == "boom"
+
+
+def test_state_store_range_query_uses_covering_index(tmp_path) -> None:
+    db_path = tmp_path / "state.db"
+    StateStore(str(db_path)).close()
+
+    conn = sqlite3.connect(str(db_path))
+    plan = " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {_SQL_SELECT_EVENT_ROWS_IN_RANGE}", (0, 1)))
+    watch_plan = " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {_SQL_SELECT_WATCH_EVENTS_IN_RANGE}", (0, 1)))
+    conn.close()
+
+    assert "COVERING INDEX idx_processed_events_range" in plan
+    assert "TEMP B-TREE" not in plan
+    assert "USING INDEX idx_processed_events_range" in watch_plan
+    assert "TEMP B-TREE" not in watch_plan
+
+
+def test_state_store_rejects_unknown_journal_mode(tmp_path) -> None:
+    with pytest.raises(RuntimeError, match="journal_mode"):
+        StateStore(str(tmp_path / "state.db"), journal_mode="WAL; DROP TABLE sync_state")
 
+
+def test_state_store_close_is_idempotent(tmp_path) -> None:
+    with StateStore(str(tmp_path / "state.db")) as store:
+        store.set_state("key", "value")
+    store.close()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.get_state("other")
+
+
+def test_state_store_close_releases_connections_when_optimize_fails(tmp_path) -> None:
+    store = StateStore(str(tmp_path / "state.db"))
+    store.fetch_events_in_range(datetime(2026, 2, 21, tzinfo=timezone.utc), datetime(2026, 2, 22, tzinfo=timezone.utc))
+    writer, reader = store._conn, store._reader
+    assert reader is not None
+    writer.set_authorizer(lambda action, *args: sqlite3.SQLITE_DENY if action == sqlite3.SQLITE_PRAGMA else sqlite3.SQLITE_OK)
+
+    store.close()
+    store.close()
+
+    for conn in (writer, reader):
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_state_store_mark_processed_raises_on_not_null_violation(make_state_store) -> None:
+    event = WatchEvent(
+        history_id=300,
+        watched_at=datetime(2026, 2, 21, 20, 0, tzinfo=timezone.utc),
+        media_type="movie",
+        trakt_id=None,
+        show_trakt_id=None,
+        season_number=None,
+        episode_number=None,
+        runtime_min=95.0,
+        year=2026,
+        title="Broken Movie",
+        show_title=None,
+        is_rewatch=False,
+    )
+    with make_state_store() as store:
+        store.preload_processed_ids()
+        with pytest.raises(sqlite3.IntegrityError):
+            store.mark_processed_many([event])
+        assert store.has_processed(300) is False
+
+
+def test_state_store_range_scan_connection_is_chosen_at_call(tmp_path) -> None:
     event = WatchEvent(
-        history_id=100,
+        history_id=400,
         watched_at=datetime(2026, 2, 21, 20, 0, tzinfo=timezone.utc),
         media_type="movie",
         trakt_id=999,
@@ -22,53 +276,65 @@ def test_state_store_cursor_and_dedupe(tmp_path) -> None:
         show_title=None,
         is_rewatch=False,
     )
-    event_2 = WatchEvent(
-        history_id=101,
-        watched_at=datetime(2026, 2, 21, 21, 0, tzinfo=timezone.utc),
-        media_type="episode",
-        trakt_id=5001,
-        show_trakt_id=7001,
-        season_number=2,
-        episode_number=5,
-        runtime_min=48.0,
-        year=2023,
-        title="Example Episode",
-        show_title="Example Show",
-        is_rewatch=True,
-    )
+    day = (datetime(2026, 2, 21, 0, 0, tzinfo=timezone.utc), datetime(2026, 2, 22, 0, 0, tzinfo=timezone.utc))
 
-    assert store.has_processed(100) is False
-    store.mark_processed_many([event, event_2])
-    assert store.has_processed(100) is True
+    with StateStore(str(tmp_path / "state.db")) as store:
+        with store.transaction():
+            store.mark_processed_many([event])
+            with store.scan_watch_events_in_range(*day) as events:
+                assert [item.history_id for item in events] == [400]
+        # Inside a transaction the scan stays on the writer, so it sees the uncommitted row.
+        assert store._reader is None
 
-    store.set_cursor(event.watched_at, event.history_id)
-    watched_at, history_id = store.get_cursor()
+    for db_path, journal_mode in ((":memory:", "WAL"), (str(tmp_path / "memory.db"), "MEMORY")):
+        with StateStore(db_path, journal_mode=journal_mode) as store:
+            store.mark_processed_many([event])
+            assert [item.history_id for item in store.fetch_watch_events_in_range(*day)] == [400]
+            assert store._reader is None
 
-    assert watched_at == event.watched_at
-    assert history_id == event.history_id
 
-    rows = store.fetch_events_in_range(
-        start_inclusive_utc=datetime(2026, 2, 21, 0, 0, tzinfo=timezone.utc),
-        end_exclusive_utc=datetime(2026, 2, 22, 0, 0, tzinfo=timezone.utc),
+def test_state_store_wal_range_scan_releases_snapshot_on_exit(tmp_path) -> None:
+    start = datetime(2026, 2, 21, 0, 0, tzinfo=timezone.utc)
+    template = WatchEvent(
+        history_id=0,
+        watched_at=start,
+        media_type="movie",
+        trakt_id=999,
+        show_trakt_id=None,
+        season_number=None,
+        episode_number=None,
+        runtime_min=95.0,
+        year=2026,
+        title="Example Movie",
+        show_title=None,
+        is_rewatch=False,
     )
-    assert len(rows) == 2
-    assert rows[0].history_id == 100
+    day = (start, start + timedelta(days=1))
 
-    watch_events = store.fetch_watch_events_in_range(
-        start_inclusive_utc=datetime(2026, 2, 21, 0, 0, tzinfo=timezone.utc),
-        end_exclusive_utc=datetime(2026, 2, 22, 0, 0, tzinfo=timezone.utc),
-    )
-    assert len(watch_events) == 2
-    assert watch_events[1].show_trakt_id == 7001
-    assert watch_events[1].episode_number == 5
+    with StateStore(str(tmp_path / "state.db")) as store:
+        store.mark_processed_many(
+            dataclasses.replace(template, history_id=index + 1, watched_at=start + timedelta(seconds=index))
+            for index in range(3000)
+        )
 
-    deleted = store.delete_processed_history_ids({101})
-    assert len(deleted) == 1
-    assert deleted[0].history_id == 101
-    assert store.has_processed(101) is False
+        with store.scan_watch_events_in_range(*day) as events:
+            assert next(events).history_id == 1
+            assert store._reader is not None
+        store.mark_processed_many([dataclasses.replace(template, history_id=5000, watched_at=start + timedelta(hours=2))])
 
-    assert store.get_trakt_refresh_token() is None
-    store.set_trakt_refresh_token("refresh-token-v2")
-    assert store.get_trakt_refresh_token() == "refresh-token-v2"
+        assert len(store.fetch_events_in_range(*day)) == 3001
+        store.checkpoint()
+        assert (tmp_path / "state.db-wal").stat().st_size == 0
 
-    store.close()
+
+def test_state_store_get_state_sees_other_connection_writes(make_state_store) -> None:
+    service = make_state_store()
+    assert service.get_trakt_refresh_token() is None
+
+    # e.g. `trakt-tracker --auth` run against the same file while the service is up.
+    with make_state_store() as cli:
+        cli.set_trakt_refresh_token("from-cli")
+
+    assert service.get_trakt_refresh_token() == "from-cli"
+    service.set_trakt_refresh_token("from-service")
+    assert service.get_trakt_refresh_token() == "from-service"
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timedelta, timezone
-from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
 
-from trakt_tracker.config import Settings
 from trakt_tracker.models import WatchEvent
-from trakt_tracker.state_store import StateStore
-from trakt_tracker.sync_engine import SyncEngine
+from trakt_tracker.state_store import ProcessedEventRow
+from trakt_tracker.sync_engine import SyncEngine, _consecutive_day_runs, _iter_in_background, _LocalDayResolver, _SyncProgress
 
 
 class FakeTraktClient:
@@ -26,125 +27,299 @@ class FakeInfluxWriter:
     def __init__(self) -> None:
         self.raw_writes: list[list[WatchEvent]] = []
         self.aggregate_writes = 0
-        self.deleted_ranges = 0
+        self.deleted_ranges: list[tuple[datetime, datetime]] = []
 
-    def write_watch_events(self, events: list[WatchEvent]) -> None:
-        self.raw_writes.append(events)
+    def write_watch_events(self, events) -> None:
+        self.raw_writes.append(list(events))
 
     def write_daily_aggregates(self, aggregates) -> None:
         if aggregates:
             self.aggregate_writes += 1
 
     def delete_watch_events_range(self, start_inclusive_utc, end_exclusive_utc) -> None:
-        del start_inclusive_utc, end_exclusive_utc
-        self.deleted_ranges += 1
-
-
-
-def _settings(db_path: Path) -> Settings:
-    return Settings(
-        trakt_client_id="client",
-        trakt_client_secret="secret",
-        trakt_refresh_token="refresh",
-        trakt_auth_code=None,
-        influx_enabled=True,
-        influx_url="http://localhost:8086",
-        influx_token="token",
-        influx_org="org",
-        influx_bucket_raw="trakt_raw",
-        influx_bucket_agg="trakt_agg",
-        sync_cron="0 6,18 * * *",
-        reconcile_cron="30 3 * * *",
-        timezone="UTC",
-        overlap_hours=24,
-        reconcile_days=7,
-        state_db_path=str(db_path),
-        log_level="INFO",
-        trakt_max_retries=5,
-        trakt_retry_after_margin=0.9,
-        trakt_min_request_interval_seconds=0.0,
-        running_in_docker=False,
-        config_path="",
-    )
-
-
-
-def test_reconcile_removes_deleted_events_and_rewrites_raw_day(tmp_path) -> None:
-    db_path = tmp_path / "state.db"
-    store = StateStore(str(db_path))
-
-    watched_at_keep = datetime.now(timezone.utc) - timedelta(days=1, minutes=10)
-    watched_at_deleted = datetime.now(timezone.utc) - timedelta(days=1, minutes=5)
-
-    keep_event = WatchEvent(
-        history_id=100,
-        watched_at=watched_at_keep,
-        media_type="movie",
-        trakt_id=999,
-        show_trakt_id=None,
-        season_number=None,
-        episode_number=None,
-        runtime_min=95.0,
-        year=2026,
-        title="Example Movie",
-        show_title=None,
-        is_rewatch=False,
-    )
-    deleted_event = WatchEvent(
-        history_id=101,
-        watched_at=watched_at_deleted,
-        media_type="episode",
-        trakt_id=5001,
-        show_trakt_id=7001,
-        season_number=1,
-        episode_number=1,
-        runtime_min=45.0,
-        year=2024,
-        title="Pilot",
-        show_title="Example Show",
-        is_rewatch=False,
-    )
-    store.mark_processed_many([keep_event, deleted_event])
-
-    payloads = [
-        {
-            "id": 100,
-            "type": "movie",
-            "watched_at": keep_event.watched_at.isoformat().replace("+00:00", "Z"),
-            "rewatched": False,
-            "movie": {
-                "title": "Example Movie",
-                "year": 2026,
-                "runtime": 95,
-                "ids": {"trakt": 999},
-            },
-        }
+        self.deleted_ranges.append((start_inclusive_utc, end_exclusive_utc))
+
+
+def test_reconcile_removes_deleted_events_and_deletes_their_raw_slots(make_settings, make_state_store) -> None:
+    with make_state_store() as store:
+        watched_at_keep = datetime.now(timezone.utc) - timedelta(days=1, minutes=10)
+        watched_at_deleted = datetime.now(timezone.utc) - timedelta(days=1, minutes=5)
+
+        keep_event = WatchEvent(
+            history_id=100,
+            watched_at=watched_at_keep,
+            media_type="movie",
+            trakt_id=999,
+            show_trakt_id=None,
+            season_number=None,
+            episode_number=None,
+            runtime_min=95.0,
+            year=2026,
+            title="Example Movie",
+            show_title=None,
+            is_rewatch=False,
+        )
+        deleted_event = WatchEvent(
+            history_id=101,
+            watched_at=watched_at_deleted,
+            media_type="episode",
+            trakt_id=5001,
+            show_trakt_id=7001,
+            season_number=1,
+            episode_number=1,
+            runtime_min=45.0,
+            year=2024,
+            title="Pilot",
+            show_title="Example Show",
+            is_rewatch=False,
+        )
+        store.mark_processed_many([keep_event, deleted_event])
+
+        payloads = [
+            {
+                "id": 100,
+                "type": "movie",
+                "watched_at": keep_event.watched_at.isoformat().replace("+00:00", "Z"),
+                "rewatched": False,
+                "movie": {
+                    "title": "Example Movie",
+                    "year": 2026,
+                    "runtime": 95,
+                    "ids": {"trakt": 999},
+                },
+            }
+        ]
+
+        fake_trakt = FakeTraktClient(payloads=payloads)
+        fake_influx = FakeInfluxWriter()
+        settings = make_settings(influx_enabled=True)
+
+        engine = SyncEngine(
+            settings=settings,
+            trakt_client=fake_trakt,
+            influx_writer=fake_influx,
+            state_store=store,
+            logger=logging.getLogger("test_sync_engine"),
+        )
+
+        stats = engine.run_reconcile()
+
+        assert stats["events_deleted"] == 1
+        assert stats["raw_seconds_rewritten"] == 1
+        assert stats["raw_days_rewritten"] == 0
+        assert store.has_processed(100) is True
+        assert store.has_processed(101) is False
+        # Only the removed event's one-second slot is cleared; the kept event five minutes earlier is left alone.
+        deleted_second = deleted_event.watched_at.replace(microsecond=0)
+        assert fake_influx.deleted_ranges == [(deleted_second, deleted_second + timedelta(seconds=1))]
+        assert [batch for batch in fake_influx.raw_writes if batch] == []
+
+        assert store.get_trakt_refresh_token() == "rotated-refresh-token"
+
+
+
+def test_incremental_skips_already_processed_events_in_bulk(make_settings, make_state_store) -> None:
+    with make_state_store() as store:
+        watched_at = datetime(2026, 2, 21, 20, 0, tzinfo=timezone.utc)
+
+        payloads = [
+            {
+                "id": history_id,
+                "type": "movie",
+                "watched_at": (watched_at + timedelta(minutes=history_id)).isoformat().replace("+00:00", "Z"),
+                "movie": {"title": f"Movie {history_id}", "year": 2026, "runtime": 90, "ids": {"trakt": history_id}},
+            }
+            for history_id in range(1, 151)
+        ]
+        # Pretend the first 120 were stored by an earlier run; the probe spans two 100-event windows.
+        store.mark_processed_many(
+            WatchEvent(
+                history_id=history_id,
+                watched_at=watched_at + timedelta(minutes=history_id),
+                media_type="movie",
+                trakt_id=history_id,
+                show_trakt_id=None,
+                season_number=None,
+                episode_number=None,
+                runtime_min=90.0,
+                year=2026,
+                title=f"Movie {history_id}",
+                show_title=None,
+                is_rewatch=False,
+            )
+            for history_id in range(1, 121)
+        )
+
+        fake_influx = FakeInfluxWriter()
+        engine = SyncEngine(
+            settings=make_settings(influx_enabled=True),
+            trakt_client=FakeTraktClient(payloads=payloads),
+            influx_writer=fake_influx,
+            state_store=store,
+            logger=logging.getLogger("test_sync_engine"),
+        )
+
+        stats = engine.run_incremental()
+
+        assert stats["events_fetched"] == 150
+        assert stats["duplicates_skipped"] == 120
+        assert stats["events_inserted"] == 30
+        assert [event.history_id for batch in fake_influx.raw_writes for event in batch] == list(range(121, 151))
+        assert store.get_cursor() == (watched_at + timedelta(minutes=150), 150)
+
+
+def test_local_day_resolver_matches_astimezone_across_dst() -> None:
+    tz = ZoneInfo("Europe/Berlin")
+    resolver = _LocalDayResolver(tz)
+    start = datetime(2026, 3, 28, 20, 0, tzinfo=timezone.utc)
+    for step in range(0, 36 * 60, 7):
+        value = start + timedelta(minutes=step)
+        assert resolver(value) == value.astimezone(tz).date()
+    assert resolver._day_for_slot.cache_info().maxsize is not None
+
+
+def test_consecutive_day_runs_split_on_gaps() -> None:
+    days = {date(2026, 3, 1), date(2026, 2, 28), date(2026, 3, 5), date(2026, 3, 2)}
+
+    assert _consecutive_day_runs(days) == [
+        [date(2026, 2, 28), date(2026, 3, 1), date(2026, 3, 2)],
+        [date(2026, 3, 5)],
     ]
 
-    fake_trakt = FakeTraktClient(payloads=payloads)
-    fake_influx = FakeInfluxWriter()
-    settings = _settings(db_path)
 
-    engine = SyncEngine(
-        settings=settings,
-        trakt_client=fake_trakt,
-        influx_writer=fake_influx,
-        state_store=store,
-        logger=logging.getLogger("test_sync_engine"),
-    )
+def test_iter_in_background_preserves_order_and_reraises() -> None:
+    assert list(_iter_in_background(iter({"id": index} for index in range(450)))) == [{"id": index} for index in range(450)]
+
+    def failing():
+        yield {"id": 1}
+        raise RuntimeError("page fetch failed")
+
+    with pytest.raises(RuntimeError, match="page fetch failed"):
+        list(_iter_in_background(failing()))
+
+
+def test_iter_in_background_closes_source_when_consumer_stops() -> None:
+    closed = []
+
+    def endless():
+        try:
+            index = 0
+            while True:
+                yield {"id": index}
+                index += 1
+        finally:
+            closed.append(True)
+
+    consumer = _iter_in_background(endless())
+    assert next(consumer) == {"id": 0}
+    consumer.close()
+
+    assert closed == [True]
+
+
+
+class EndlessTraktClient(FakeTraktClient):
+    def __init__(self, watched_at: datetime) -> None:
+        super().__init__(payloads=[])
+        self._watched_at = watched_at
+        self.closed = False
+
+    def iter_history(self, start_at, end_at, per_page: int = 100, page_callback=None):
+        del start_at, end_at, per_page, page_callback
+        history_id = 0
+        try:
+            while True:
+                history_id += 1
+                yield {
+                    "id": history_id,
+                    "type": "movie",
+                    "watched_at": (self._watched_at + timedelta(seconds=history_id)).isoformat().replace("+00:00", "Z"),
+                    "movie": {"title": f"Movie {history_id}", "year": 2026, "runtime": 90, "ids": {"trakt": history_id}},
+                }
+        finally:
+            self.closed = True
+
+
+class FailingInfluxWriter(FakeInfluxWriter):
+    def write_watch_events(self, events) -> None:
+        raise RuntimeError("influx down")
+
+
+def test_sync_window_stops_fetching_when_a_flush_fails(make_settings, make_state_store) -> None:
+    trakt = EndlessTraktClient(datetime(2026, 2, 21, 20, 0, tzinfo=timezone.utc))
+    with make_state_store() as store:
+        engine = SyncEngine(
+            settings=make_settings(influx_enabled=True, influx_batch_size=100),
+            trakt_client=trakt,
+            influx_writer=FailingInfluxWriter(),
+            state_store=store,
+            logger=logging.getLogger("test_sync_engine"),
+        )
+
+        with pytest.raises(RuntimeError, match="influx down"):
+            engine.run_incremental()
+
+    # The fetch thread is stopped and joined before the error propagates, not left to garbage collection.
+    assert trakt.closed is True
+
+
+def test_sync_progress_renders_at_most_ten_times_per_second(monkeypatch, capsys) -> None:
+    monkeypatch.setattr("sys.stdout.isatty", lambda: True)
+    monkeypatch.setattr("trakt_tracker.sync_engine.monotonic", lambda: 100.0)
+    progress = _SyncProgress(job_name="backfill")
+
+    for page in range(1, 6):
+        progress.on_page_loaded(page, 5, 500)
 
-    stats = engine.run_reconcile()
+    rendered = capsys.readouterr().out
+    assert "page 1/5" in rendered
+    assert "page 3/5" not in rendered
+    assert "page 5/5" in rendered
 
-    assert stats["events_deleted"] == 1
-    assert stats["days_rewritten_raw"] == 1
-    assert store.has_processed(100) is True
-    assert store.has_processed(101) is False
-    assert fake_influx.deleted_ranges == 1
 
-    rewritten_events = [batch for batch in fake_influx.raw_writes if batch]
-    assert len(rewritten_events) == 1
-    assert [event.history_id for event in rewritten_events[0]] == [100]
+def test_rewrite_raw_events_targets_seconds_then_falls_back_to_days(make_settings, make_state_store) -> None:
+    with make_state_store() as store:
+        watched_at = datetime(2026, 2, 21, 12, 0, 0, 500000, tzinfo=timezone.utc)
+        survivor = WatchEvent(
+            history_id=1,
+            watched_at=watched_at,
+            media_type="movie",
+            trakt_id=1,
+            show_trakt_id=None,
+            season_number=None,
+            episode_number=None,
+            runtime_min=90.0,
+            year=2026,
+            title="Survivor",
+            show_title=None,
+            is_rewatch=False,
+        )
+        store.mark_processed_many([survivor])
+        fake_influx = FakeInfluxWriter()
+        engine = SyncEngine(
+            settings=make_settings(influx_enabled=True),
+            trakt_client=FakeTraktClient(payloads=[]),
+            influx_writer=fake_influx,
+            state_store=store,
+            logger=logging.getLogger("test_sync_engine"),
+        )
+        local_day = watched_at.date()
 
-    assert store.get_trakt_refresh_token() == "rotated-refresh-token"
+        # A removed event in the survivor's second: that second is cleared and the survivor re-exported.
+        same_second = ProcessedEventRow(2, watched_at.replace(microsecond=0), "movie", "movie:2", 90.0, False)
+        assert engine._rewrite_raw_events([same_second], {local_day}) == (1, 0)
+        assert fake_influx.deleted_ranges == [(same_second.watched_at, same_second.watched_at + timedelta(seconds=1))]
+        assert [[event.history_id for event in batch] for batch in fake_influx.raw_writes] == [[1]]
 
-    store.close()
+        # Too many distinct seconds: the whole local day is cleared and rewritten instead.
+        fake_influx.deleted_ranges.clear()
+        fake_influx.raw_writes.clear()
+        many = [
+            ProcessedEventRow(100 + index, watched_at + timedelta(minutes=index), "movie", "movie:x", 90.0, False)
+            for index in range(30)
+        ]
+        assert engine._rewrite_raw_events(many, {local_day}) == (0, 1)
+        assert fake_influx.deleted_ranges == [
+            (datetime(2026, 2, 21, tzinfo=timezone.utc), datetime(2026, 2, 22, tzinfo=timezone.utc))
+        ]
+        assert [[event.history_id for event in batch] for batch in fake_influx.raw_writes] == [[1]]
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from trakt_tracker.config import Settings
+from trakt_tracker import trakt_client as trakt_client_module
+from trakt_tracker.trakt_client import TraktClient, _to_trakt_iso
+
+
+def _client(settings: Settings, page_count: int, per_page: int) -> tuple[TraktClient, list[int]]:
+    requested_pages: list[int] = []
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/oauth/token":
+            return httpx.Response(200, json={"access_token": "access", "expires_in": 3600})
+
+        page = int(request.url.params["page"])
+        with lock:
+            requested_pages.append(page)
+        items = [{"id": page * 1000 + index} for index in range(per_page)] if page <= page_count else []
+        headers = {"X-Pagination-Page-Count": str(page_count), "X-Pagination-Item-Count": str(page_count * per_page)}
+        return httpx.Response(200, json=items, headers=headers)
+
+    client = TraktClient(settings=settings, logger=logging.getLogger("test_trakt_client"))
+    client._http.close()
+    client._http = httpx.Client(base_url="https://api.trakt.tv", transport=httpx.MockTransport(handler))
+    return client, requested_pages
+
+
+
+def test_iter_history_prefetches_pages_but_yields_in_order(make_settings) -> None:
+    client, requested_pages = _client(make_settings(trakt_page_concurrency=3), page_count=5, per_page=2)
+    pages_seen: list[int] = []
+
+    items = list(
+        client.iter_history(
+            start_at=None,
+            end_at=None,
+            per_page=2,
+            page_callback=lambda page, page_count, total: pages_seen.append(page),
+        )
+    )
+    client.close()
+
+    assert [item["id"] for item in items] == [
+        1000, 1001, 2000, 2001, 3000, 3001, 4000, 4001, 5000, 5001,
+    ]
+    assert pages_seen == [1, 2, 3, 4, 5]
+    assert sorted(requested_pages) == [1, 2, 3, 4, 5]
+
+
+
+def test_iter_history_sequential_when_concurrency_is_one(make_settings) -> None:
+    client, requested_pages = _client(make_settings(trakt_page_concurrency=1), page_count=3, per_page=2)
+
+    items = list(client.iter_history(start_at=None, end_at=None, per_page=2))
+    client.close()
+
+    assert [item["id"] for item in items] == [1000, 1001, 2000, 2001, 3000, 3001]
+    assert requested_pages == [1, 2, 3]
+
+
+
+def test_request_rebuilds_auth_headers_after_token_refresh(make_settings) -> None:
+    issued_tokens = iter(["stale", "fresh"])
+    authorizations: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/oauth/token":
+            return httpx.Response(200, json={"access_token": next(issued_tokens), "expires_in": 3600})
+        authorizations.append(request.headers["Authorization"])
+        if request.headers["Authorization"] == "Bearer stale":
+            return httpx.Response(401)
+        return httpx.Response(200, json=[])
+
+    client = TraktClient(settings=make_settings(trakt_page_concurrency=1), logger=logging.getLogger("test_trakt_client"))
+    client._http.close()
+    client._http = httpx.Client(base_url="https://api.trakt.tv", transport=httpx.MockTransport(handler))
+
+    assert list(client.iter_history(start_at=None, end_at=None)) == []
+    client.close()
+
+    assert authorizations == ["Bearer stale", "Bearer fresh"]
+
+
+
+def test_throttle_admits_burst_then_spaces_requests(make_settings, monkeypatch) -> None:
+    settings = make_settings(trakt_page_concurrency=1, trakt_min_request_interval_seconds=2.0, trakt_request_burst=3)
+    clock = {"now": 100.0}
+    sleeps: list[float] = []
+
+    def fake_sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        clock["now"] += seconds
+
+    monkeypatch.setattr(trakt_client_module.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(trakt_client_module.time, "sleep", fake_sleep)
+    client = TraktClient(settings=settings, logger=logging.getLogger("test_trakt_client"))
+
+    for _ in range(5):
+        client._throttle_requests()
+    client.close()
+
+    assert sleeps == [2.0, 2.0]
+
+
+
+def test_to_trakt_iso_formats_utc_seconds() -> None:
+    berlin = timezone(timedelta(hours=1))
+
+    assert _to_trakt_iso(datetime(2026, 2, 21, 21, 0, 5, 123456, tzinfo=timezone.utc)) == "2026-02-21T21:00:05Z"
+    assert _to_trakt_iso(datetime(2026, 2, 21, 22, 0, tzinfo=berlin)) == "2026-02-21T21:00:00Z"